@@ -0,0 +1,80 @@
+from http.server import BaseHTTPRequestHandler
+import json
+import os
+import sys
+
+# Make the shared vigent package importable from the serverless function
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from vigent.generation import stream_application_events
+from vigent.gemini import get_model
+from vigent.sse import SSE_HEADERS, event_stream
+
+# Gemini is configured once, in vigent.gemini
+GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+
+class handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        try:
+            if not GEMINI_API_KEY:
+                self.send_response(400)
+                self.send_header('Content-type', 'application/json')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                self.wfile.write(json.dumps({
+                    'error': 'GEMINI_API_KEY not configured'
+                }).encode())
+                return
+            
+            content_length = int(self.headers['Content-Length'])
+            post_data = self.rfile.read(content_length)
+            data = json.loads(post_data.decode('utf-8'))
+            
+            job = data.get('job', {})
+            resume = data.get('resume', '')
+            
+            if not resume:
+                self.send_response(400)
+                self.send_header('Content-type', 'application/json')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                self.wfile.write(json.dumps({
+                    'error': 'Resume text is required'
+                }).encode())
+                return
+            
+            model = get_model()
+            events = stream_application_events(
+                model, job.get('title', ''), job.get('description', ''), resume,
+                regenerate=bool(data.get('regenerate')),
+                batch_answers=data.get('batch_answers')
+            )
+            
+            # Cover letter tokens, then questions, then each answer as Server-Sent Events
+            self.send_response(200)
+            for header, value in SSE_HEADERS.items():
+                self.send_header(header, value)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            for message in event_stream(events):
+                self.wfile.write(message.encode())
+                self.wfile.flush()
+            
+        except Exception as e:
+            self.send_response(500)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(json.dumps({
+                'error': f'Error generating application: {str(e)}'
+            }).encode())
+        
+        return
+    
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
+        return
@@ -1,162 +1,99 @@
 from http.server import BaseHTTPRequestHandler
 import json
-import feedparser
-from datetime import datetime
-import logging
+import os
+import sys
+from urllib.parse import parse_qsl, urlparse
+
+# Make the shared vigent package importable from the serverless function
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vigent.ingest import parse_job_query
+from vigent.ranking import parse_rank_query, rank_jobs
+from vigent.snapshots import jobs_snapshot
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
+        self.handle_jobs(dict(parse_qsl(urlparse(self.path).query)))
+        return
+    
+    def do_POST(self):
+        # Ranking by resume: the resume is too large for a query string
+        params = dict(parse_qsl(urlparse(self.path).query))
         try:
-            query_params = {}
-            if '?' in self.path:
-                query_string = self.path.split('?')[1]
-                for param in query_string.split('&'):
-                    if '=' in param:
-                        key, value = param.split('=', 1)
-                        query_params[key] = value
-            
-            source = query_params.get('source', 'all')
-            jobs = []
-            
-            # Remotive.io RSS feed
-            if source in ['remotive', 'all']:
-                try:
-                    remotive_url = "https://remotive.com/api/remote-jobs/feed"
-                    feed = feedparser.parse(remotive_url)
-                    
-                    for entry in feed.entries[:15]:
-                        try:
-                            pub_date_obj = None
-                            if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                                pub_date_obj = datetime(*entry.published_parsed[:6])
-                                pub_date_formatted = pub_date_obj.strftime('%B %d, %Y')
-                            else:
-                                pub_date_formatted = entry.get('published', 'N/A')
-                            
-                            summary = entry.get('summary', 'No description available')
-                            if len(summary) > 250:
-                                summary = summary[:250] + '...'
-                            
-                            title = entry.get('title', 'No Title')
-                            job_type = 'Full-time'
-                            if 'part-time' in title.lower() or 'part time' in summary.lower():
-                                job_type = 'Part-time'
-                            if 'contract' in title.lower() or 'freelance' in title.lower():
-                                job_type = 'Contract'
-                            
-                            job = {
-                                'id': hash(entry.get('link', '')),
-                                'title': title,
-                                'link': entry.get('link', '#'),
-                                'description': summary,
-                                'summary': summary,
-                                'published': pub_date_formatted,
-                                'published_date': pub_date_obj.isoformat() if pub_date_obj else None,
-                                'posted': pub_date_formatted,
-                                'source': 'Remotive',
-                                'budget': 'See job posting',
-                                'job_type': job_type,
-                                'location': 'Remote',
-                                'skills': []
-                            }
-                            jobs.append(job)
-                        except Exception as e:
-                            logging.error(f"Error parsing Remotive entry: {str(e)}")
-                            continue
-                except Exception as e:
-                    logging.error(f"Error fetching Remotive feed: {str(e)}")
-            
-            # We Work Remotely RSS feed
-            if source in ['wwremote', 'all']:
-                try:
-                    wwr_url = "https://weworkremotely.com/remote-jobs.rss"
-                    feed = feedparser.parse(wwr_url)
-                    
-                    for entry in feed.entries[:15]:
-                        try:
-                            pub_date_obj = None
-                            if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                                pub_date_obj = datetime(*entry.published_parsed[:6])
-                                pub_date_formatted = pub_date_obj.strftime('%B %d, %Y')
-                            else:
-                                pub_date_formatted = entry.get('published', 'N/A')
-                            
-                            summary = entry.get('summary', 'No description available')
-                            if len(summary) > 250:
-                                summary = summary[:250] + '...'
-                            
-                            title = entry.get('title', 'No Title')
-                            job_type = 'Full-time'
-                            if 'part-time' in title.lower() or 'part time' in summary.lower():
-                                job_type = 'Part-time'
-                            if 'contract' in title.lower() or 'freelance' in title.lower():
-                                job_type = 'Contract'
-                            
-                            job = {
-                                'id': hash(entry.get('link', '') + 'wwr'),
-                                'title': title,
-                                'link': entry.get('link', '#'),
-                                'description': summary,
-                                'summary': summary,
-                                'published': pub_date_formatted,
-                                'published_date': pub_date_obj.isoformat() if pub_date_obj else None,
-                                'posted': pub_date_formatted,
-                                'source': 'We Work Remotely',
-                                'budget': 'See job posting',
-                                'job_type': job_type,
-                                'location': 'Anywhere',
-                                'skills': []
-                            }
-                            jobs.append(job)
-                        except Exception as e:
-                            logging.error(f"Error parsing WWR entry: {str(e)}")
-                            continue
-                except Exception as e:
-                    logging.error(f"Error fetching WWR feed: {str(e)}")
+            content_length = int(self.headers.get('Content-Length') or 0)
+            if content_length:
+                data = json.loads(self.rfile.read(content_length).decode('utf-8'))
+                if not isinstance(data, dict):
+                    raise ValueError('Body must be a JSON object')
+                params.update(data)
+        except ValueError:
+            self.send_json(400, {
+                'success': False,
+                'error': 'Invalid JSON body',
+                'jobs': []
+            })
+            return
+        self.handle_jobs(params)
+        return
+    
+    def handle_jobs(self, query_params):
+        try:
+            ranked = bool(query_params.get('resume') or query_params.get('resume_hash'))
             
-            if not jobs:
-                self.send_response(404)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({
+            try:
+                query = parse_rank_query(query_params) if ranked else parse_job_query(query_params)
+                if ranked:
+                    jobs, next_offset, resume_hash = rank_jobs(**query)
+            except ValueError as e:
+                self.send_json(400, {
                     'success': False,
-                    'error': 'No jobs found from any source',
+                    'error': str(e),
                     'jobs': []
-                }).encode())
+                })
                 return
             
-            # Sort by publish date (newest first)
-            jobs.sort(key=lambda x: x.get('published_date') or '', reverse=True)
+            if ranked:
+                self.send_json(200, {
+                    'success': True,
+                    'count': len(jobs),
+                    'source': query['source'],
+                    'resume_hash': resume_hash,
+                    'next_offset': next_offset,
+                    'jobs': jobs
+                })
+                return
             
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
+            # Pre-rendered and compressed once per store version; revalidates with 304
+            snapshot = jobs_snapshot(query, query_params)
+            status, headers, body = snapshot.response(
+                self.headers.get('Accept-Encoding'),
+                self.headers.get('If-None-Match')
+            )
+            self.send_response(status)
+            for header, value in headers.items():
+                self.send_header(header, value)
             self.send_header('Access-Control-Allow-Origin', '*')
             self.end_headers()
-            self.wfile.write(json.dumps({
-                'success': True,
-                'count': len(jobs),
-                'source': source,
-                'jobs': jobs
-            }).encode())
+            self.wfile.write(body)
             
         except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(json.dumps({
+            self.send_json(500, {
                 'success': False,
                 'error': f'Failed to fetch jobs: {str(e)}',
                 'jobs': []
-            }).encode())
-        
-        return
+            })
+    
+    def send_json(self, status, payload):
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(json.dumps(payload).encode())
     
     def do_OPTIONS(self):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
         return
@@ -0,0 +1,64 @@
+from http.server import BaseHTTPRequestHandler
+import json
+import os
+import sys
+from urllib.parse import parse_qsl, urlparse
+
+# Make the shared vigent package importable from the serverless function
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from vigent.ingest import parse_search_query, search_jobs
+
+class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        try:
+            query_params = dict(parse_qsl(urlparse(self.path).query))
+            
+            try:
+                query = parse_search_query(query_params)
+            except ValueError as e:
+                self.send_response(400)
+                self.send_header('Content-type', 'application/json')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                self.wfile.write(json.dumps({
+                    'success': False,
+                    'error': str(e),
+                    'jobs': []
+                }).encode())
+                return
+            
+            jobs, next_offset = search_jobs(**query)
+            
+            self.send_response(200)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(json.dumps({
+                'success': True,
+                'count': len(jobs),
+                'query': query['text'],
+                'next_offset': next_offset,
+                'jobs': jobs
+            }).encode())
+            
+        except Exception as e:
+            self.send_response(500)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(json.dumps({
+                'success': False,
+                'error': f'Failed to search jobs: {str(e)}',
+                'jobs': []
+            }).encode())
+        
+        return
+    
+    def do_OPTIONS(self):
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
+        return
@@ -1,20 +1,54 @@
 import os
 import json
-import feedparser
-from datetime import datetime
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, redirect, stream_with_context, url_for
 from dotenv import load_dotenv
-import google.generativeai as genai
 
+# vigent modules read their settings from the environment when imported, so .env must be loaded first
 load_dotenv()
 
+from vigent.ingest import parse_job_query, parse_search_query, search_jobs
+from vigent.bulk import bulk_application_events, parse_bulk_request
+from vigent.ranking import parse_rank_query, rank_jobs
+from vigent.refresher import FEED_REFRESHER, start_refresher
+from vigent.snapshots import jobs_snapshot
+from vigent.sse import SSE_HEADERS, event_stream
+from vigent.tasks import submit_application_task, task_store
+from vigent.generation import (
+    GenerationError, cached_application_package, proposal_cache_key, proposal_prompt,
+    stream_application_events, stream_proposal_events
+)
+from vigent.generation_cache import generation_cache
+from vigent.gemini import get_model
+from vigent import metrics
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SESSION_SECRET', 'dev-secret-key-change-in-production')
 
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
+# Keep the job store fresh in the background so requests never wait on feeds
+if FEED_REFRESHER:
+    start_refresher()
+
+@app.before_request
+def start_request_timing():
+    metrics.start_request()
+
+@app.after_request
+def record_request_timing(response):
+    # Streamed bodies are still being generated here, so they only report time to first byte
+    timings = metrics.current_request()
+    if timings is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.http_request_duration.observe(
+            timings.elapsed(), route=route, method=request.method, status=response.status_code)
+        response.headers['Server-Timing'] = timings.header()
+    return response
+
+@app.route('/api/metrics')
+def get_metrics():
+    """Request, Gemini and feed histograms for this process, in the Prometheus text format."""
+    return Response(metrics.render_metrics(), mimetype=metrics.CONTENT_TYPE)
 
 @app.route('/')
 def index():
@@ -35,26 +69,22 @@ def generate_proposal():
         job_description = data.get('description', '')
         job_budget = data.get('budget', '')
         
-        prompt = f"""You are an expert freelance proposal writer. Write a compelling, professional Upwork proposal for the following job.
-
-Job Title: {job_title}
-
-Job Description: {job_description}
-
-Budget: {job_budget}
-
-Write a personalized proposal that:
-1. Directly addresses the client's needs
-2. Highlights relevant experience and skills
-3. Explains your approach to the project
-4. Shows enthusiasm and professionalism
-5. Includes a brief call-to-action
-6. Is concise (200-300 words)
-
-Do not include placeholder text like [Your Name] or generic statements. Write as if you are a skilled freelancer with relevant experience."""
-
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        response = model.generate_content(prompt)
+        regenerate = bool(data.get('regenerate')) or request.args.get('regenerate') == 'true'
+        
+        model = get_model()
+        
+        # Same job details and model: reuse the earlier proposal unless asked to regenerate
+        cache_key = proposal_cache_key(model, job_title, job_description, job_budget)
+        proposal_text = None if regenerate else generation_cache.get(cache_key)
+        if proposal_text is not None:
+            return jsonify({
+                'proposal': proposal_text,
+                'success': True,
+                'cached': True
+            })
+        
+        with metrics.gemini_call('proposal'):
+            response = model.generate_content(proposal_prompt(job_title, job_description, job_budget))
         
         if not response or not hasattr(response, 'text') or not response.text:
             return jsonify({
@@ -62,12 +92,19 @@ Do not include placeholder text like [Your Name] or generic statements. Write as
             }), 400
         
         proposal_text = response.text
+        generation_cache.set(cache_key, proposal_text)
         
         return jsonify({
             'proposal': proposal_text,
-            'success': True
+            'success': True,
+            'cached': False
         })
     
+    except GenerationError as e:
+        return jsonify({
+            'error': e.message
+        }), e.status
+    
     except Exception as e:
         return jsonify({
             'error': f'Error generating proposal: {str(e)}'
@@ -99,285 +136,315 @@ def generate_application():
         job_title = job.get('title', '')
         job_description = job.get('description', '')
         
-        # Generate cover letter
-        cover_letter_prompt = f"""You are an expert career coach. Write a compelling, professional cover letter for this job application.
-
-Job Title: {job_title}
-
-Job Description: {job_description}
-
-Candidate's Resume:
-{resume}
-
-Write a personalized cover letter that:
-1. Directly addresses the job requirements
-2. Highlights relevant experience from the resume
-3. Shows genuine interest in the role
-4. Is professional yet personable
-5. Is concise (250-350 words)
-
-Write the cover letter in first person, ready to copy and paste. Do not include placeholders like [Date] or [Company Name]."""
-
-        # Generate interview questions
-        questions_prompt = f"""You are an expert interviewer. Based on this job description, generate 5 common interview questions that would likely be asked.
-
-Job Title: {job_title}
-
-Job Description: {job_description}
+        regenerate = bool(data.get('regenerate')) or request.args.get('regenerate') == 'true'
+        
+        model = get_model()
+        
+        # Cover letter, questions and answers are fanned out concurrently;
+        # a repeat request for the same job and resume is served from the cache
+        package, cached = cached_application_package(
+            model, job_title, job_description, resume,
+            regenerate=regenerate,
+            batch_answers=data.get('batch_answers')
+        )
+        cover_letter = package['cover_letter']
+        qa_pairs = package['questions']
+        
+        return jsonify({
+            'success': True,
+            'cover_letter': cover_letter,
+            'questions': qa_pairs,
+            'cached': cached
+        })
+    
+    except GenerationError as e:
+        return jsonify({
+            'error': e.message
+        }), e.status
+    
+    except Exception as e:
+        app.logger.error(f"Error generating application: {str(e)}")
+        return jsonify({
+            'error': f'Error generating application: {str(e)}'
+        }), 500
 
-Generate 5 realistic interview questions that:
-1. Focus on key skills and requirements from the job description
-2. Are commonly asked in real interviews
-3. Are specific to this role
-4. Range from technical to behavioral
+@app.route('/api/generate-proposal/stream', methods=['POST'])
+def stream_proposal():
+    """
+    Streaming variant of /api/generate-proposal. Sends Server-Sent Events:
+    'proposal' (text deltas as Gemini writes them), then 'done' or 'error'.
+    """
+    if not GEMINI_API_KEY:
+        return jsonify({
+            'error': 'GEMINI_API_KEY not configured. Please add your API key to the .env file.'
+        }), 400
+    
+    data = request.json or {}
+    regenerate = bool(data.get('regenerate')) or request.args.get('regenerate') == 'true'
+    model = get_model()
+    events = stream_proposal_events(
+        model, data.get('title', ''), data.get('description', ''), data.get('budget', ''),
+        regenerate=regenerate
+    )
+    return Response(stream_with_context(event_stream(events)), headers=SSE_HEADERS)
+
+@app.route('/api/generate-application/stream', methods=['POST'])
+def stream_application():
+    """
+    Streaming variant of /api/generate-application. Sends Server-Sent Events:
+    - cover_letter: {"delta"} text as Gemini writes it
+    - questions: {"questions"} the interview questions
+    - answer: {"index", "question", "answer"} each answer as it completes
+    - done / error
+    """
+    if not GEMINI_API_KEY:
+        return jsonify({
+            'error': 'GEMINI_API_KEY not configured. Please add your API key to the .env file.'
+        }), 400
+    
+    data = request.json or {}
+    job = data.get('job', {})
+    resume = data.get('resume', '')
+    
+    if not resume:
+        return jsonify({
+            'error': 'Resume text is required'
+        }), 400
+    
+    regenerate = bool(data.get('regenerate')) or request.args.get('regenerate') == 'true'
+    model = get_model()
+    events = stream_application_events(
+        model, job.get('title', ''), job.get('description', ''), resume,
+        regenerate=regenerate,
+        batch_answers=data.get('batch_answers')
+    )
+    return Response(stream_with_context(event_stream(events)), headers=SSE_HEADERS)
+
+@app.route('/api/generate-application/bulk', methods=['POST'])
+def generate_bulk_applications():
+    """
+    Generate application packages for several stored jobs and one resume.
+    Body: {"job_ids": [...], "resume": "...", "regenerate": false}. Returns
+    every job's result (see /api/generate-application/bulk/stream for the
+    fields), in completion order.
+    """
+    try:
+        if not GEMINI_API_KEY:
+            return jsonify({
+                'error': 'GEMINI_API_KEY not configured. Please add your API key to the .env file.'
+            }), 400
+        
+        data = request.json or {}
+        try:
+            job_ids, resume = parse_bulk_request(data)
+        except ValueError as e:
+            return jsonify({
+                'error': str(e)
+            }), 400
+        
+        regenerate = bool(data.get('regenerate')) or request.args.get('regenerate') == 'true'
+        events = bulk_application_events(get_model(), job_ids, resume, regenerate=regenerate)
+        applications = [result for event, result in events if event == 'application']
+        
+        return jsonify({
+            'success': True,
+            'count': len(applications),
+            'failed': sum(1 for application in applications if not application['success']),
+            'applications': applications
+        })
+    
+    except Exception as e:
+        app.logger.error(f"Error generating bulk applications: {str(e)}")
+        return jsonify({
+            'error': f'Error generating applications: {str(e)}'
+        }), 500
 
-Return ONLY a JSON array of questions, like this:
-["Question 1", "Question 2", "Question 3", "Question 4", "Question 5"]"""
+@app.route('/api/generate-application/bulk/stream', methods=['POST'])
+def stream_bulk_applications():
+    """
+    Streaming variant of /api/generate-application/bulk. Sends Server-Sent Events:
+    - application: {"job_id", "success", "cover_letter", "questions", "cached"}
+      as each job finishes, or {"job_id", "success": false, "error", "status"}
+    - done: {"count", "failed"} / error
+    """
+    if not GEMINI_API_KEY:
+        return jsonify({
+            'error': 'GEMINI_API_KEY not configured. Please add your API key to the .env file.'
+        }), 400
+    
+    data = request.json or {}
+    try:
+        job_ids, resume = parse_bulk_request(data)
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    
+    regenerate = bool(data.get('regenerate')) or request.args.get('regenerate') == 'true'
+    events = bulk_application_events(get_model(), job_ids, resume, regenerate=regenerate)
+    return Response(stream_with_context(event_stream(events)), headers=SSE_HEADERS)
 
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        
-        # Generate cover letter
-        cover_response = model.generate_content(cover_letter_prompt)
-        if not cover_response or not hasattr(cover_response, 'text') or not cover_response.text:
+@app.route('/api/generate-application/tasks', methods=['POST'])
+def submit_application():
+    """
+    Queue an application package (same body as /api/generate-application)
+    and return its task_id immediately. Poll /api/generate-application/tasks/<task_id>.
+    """
+    try:
+        if not GEMINI_API_KEY:
             return jsonify({
-                'error': 'Failed to generate cover letter'
+                'error': 'GEMINI_API_KEY not configured. Please add your API key to the .env file.'
             }), 400
         
-        cover_letter = cover_response.text
+        data = request.json or {}
+        job = data.get('job', {})
+        resume = data.get('resume', '')
         
-        # Generate questions
-        questions_response = model.generate_content(questions_prompt)
-        if not questions_response or not hasattr(questions_response, 'text') or not questions_response.text:
+        if not resume:
             return jsonify({
-                'error': 'Failed to generate interview questions'
+                'error': 'Resume text is required'
             }), 400
         
-        # Parse questions from response with robust handling of markdown fences
-        try:
-            questions_text = questions_response.text.strip()
-            
-            # Remove markdown code fences if present (```json ... ``` or ``` ... ```)
-            if questions_text.startswith('```'):
-                # Find the first newline after opening fence
-                first_newline = questions_text.find('\n')
-                if first_newline != -1:
-                    questions_text = questions_text[first_newline + 1:]
-                # Remove closing fence
-                if questions_text.endswith('```'):
-                    questions_text = questions_text[:-3]
-                questions_text = questions_text.strip()
-            
-            # Try to parse as JSON array
-            if questions_text.startswith('[') and questions_text.endswith(']'):
-                parsed_questions = json.loads(questions_text)
-                # Validate that all entries are non-empty strings
-                questions_list = [
-                    q.strip() for q in parsed_questions 
-                    if isinstance(q, str) and len(q.strip()) > 10
-                ]
-            else:
-                # Fallback: parse line-by-line and filter garbage
-                lines = [line.strip('- 0123456789."\'') for line in questions_text.split('\n')]
-                questions_list = [
-                    q for q in lines 
-                    if q and len(q) > 10 and not q.lower().startswith('json')
-                ]
-            
-            # If we still don't have good questions, use fallback
-            if not questions_list or len(questions_list) < 3:
-                raise ValueError("Insufficient valid questions parsed")
-                
-        except Exception as e:
-            app.logger.warning(f"Question parsing failed: {str(e)}, using fallback questions")
-            # Fallback questions
-            questions_list = [
-                "Tell me about your relevant experience for this role.",
-                "What interests you about this position?",
-                "Describe a challenging project you've worked on.",
-                "What are your salary expectations?",
-                "Where do you see yourself in 3 years?"
-            ]
-        
-        # Generate answers for each question
-        qa_pairs = []
-        for question in questions_list[:5]:  # Limit to 5 questions
-            answer_prompt = f"""You are helping a job candidate prepare for an interview. Based on their resume, generate a strong, concise answer to this interview question.
-
-Interview Question: {question}
-
-Candidate's Resume:
-{resume}
-
-Generate a professional, concise answer (2-3 sentences) that:
-1. Directly answers the question
-2. References specific experience from the resume when relevant
-3. Is confident and professional
-4. Uses first person ("I have...")
-
-Return ONLY the answer text, no introduction or explanation."""
-
-            answer_response = model.generate_content(answer_prompt)
-            if answer_response and hasattr(answer_response, 'text') and answer_response.text:
-                answer = answer_response.text.strip()
-            else:
-                answer = "Based on my experience outlined in my resume, I have the relevant skills and background for this aspect of the role."
-            
-            qa_pairs.append({
-                'question': question,
-                'answer': answer
-            })
+        regenerate = bool(data.get('regenerate')) or request.args.get('regenerate') == 'true'
+        task_id = submit_application_task(
+            get_model(),
+            job.get('title', ''), job.get('description', ''), resume,
+            regenerate=regenerate
+        )
         
         return jsonify({
             'success': True,
-            'cover_letter': cover_letter,
-            'questions': qa_pairs
-        })
+            'task_id': task_id,
+            'status': 'queued',
+            'poll_url': url_for('get_application_task', task_id=task_id)
+        }), 202
     
     except Exception as e:
-        app.logger.error(f"Error generating application: {str(e)}")
+        app.logger.error(f"Error queueing application: {str(e)}")
         return jsonify({
-            'error': f'Error generating application: {str(e)}'
+            'error': f'Error queueing application: {str(e)}'
         }), 500
 
-@app.route('/api/jobs')
+@app.route('/api/generate-application/tasks/<task_id>')
+def get_application_task(task_id):
+    """
+    Progress of a queued application package. status is queued, running,
+    done or error; cover_letter and questions hold whatever is finished so
+    far (answers not yet generated are null).
+    """
+    task = task_store.get(task_id)
+    if task is None:
+        return jsonify({
+            'success': False,
+            'error': 'Task not found'
+        }), 404
+    
+    return jsonify({
+        'success': task['status'] != 'error',
+        **task
+    })
+
+@app.route('/api/jobs', methods=['GET', 'POST'])
 def get_remote_jobs():
     """
-    Fetch live job listings from remote job board RSS feeds.
+    List job board jobs from the persistent job store (filled by vigent.ingest).
+    Query parameters (or a JSON body for POST):
+    - source: Job board source (remotive, wwremote, a source label, or all)
+    - job_type: Full-time, Part-time or Contract
+    - location: Remote, Anywhere, US or Europe
+    - date: today, week or month
+    - limit: Page size (default 50, max 100)
+    - cursor: next_cursor from the previous page
+    - resume / resume_hash: Rank jobs by similarity to a resume instead of by
+      date (page with offset). POST the resume once, then reuse the returned
+      resume_hash.
+    """
+    try:
+        params = dict(request.args)
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            if not isinstance(data, dict):
+                return jsonify({
+                    'success': False,
+                    'error': 'Invalid JSON body',
+                    'jobs': []
+                }), 400
+            params.update(data)
+        ranked = bool(params.get('resume') or params.get('resume_hash'))
+        
+        try:
+            query = parse_rank_query(params) if ranked else parse_job_query(params)
+            if ranked:
+                with metrics.span('rank'):
+                    jobs, next_offset, resume_hash = rank_jobs(**query)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e),
+                'jobs': []
+            }), 400
+        
+        if ranked:
+            return jsonify({
+                'success': True,
+                'count': len(jobs),
+                'source': query['source'],
+                'resume_hash': resume_hash,
+                'next_offset': next_offset,
+                'jobs': jobs
+            })
+        
+        # Pre-rendered and compressed once per store version; revalidates with 304
+        snapshot = jobs_snapshot(query, params)
+        status, headers, body = snapshot.response(
+            request.headers.get('Accept-Encoding'),
+            request.headers.get('If-None-Match')
+        )
+        return Response(body, status=status, headers=headers)
+    
+    except Exception as e:
+        app.logger.error(f"Error fetching remote jobs: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Failed to fetch jobs: {str(e)}',
+            'jobs': []
+        }), 500
+
+@app.route('/api/jobs/search')
+def search_remote_jobs():
+    """
+    Full-text search over stored job titles and descriptions, best match first.
     Query parameters:
-    - source: Job board source (remotive, wwremote, or all)
+    - q: Search text (required)
+    - source, job_type, location, date, limit: Same filters as /api/jobs
+    - offset: next_offset from the previous page
     """
     try:
-        source = request.args.get('source', 'all')
-        
-        jobs = []
-        
-        # Remotive.io RSS feed
-        if source in ['remotive', 'all']:
-            try:
-                app.logger.info("Fetching Remotive.io RSS feed")
-                remotive_url = "https://remotive.com/api/remote-jobs/feed"
-                feed = feedparser.parse(remotive_url)
-                
-                for entry in feed.entries[:15]:
-                    try:
-                        pub_date = entry.get('published', 'N/A')
-                        pub_date_obj = None
-                        if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                            pub_date_obj = datetime(*entry.published_parsed[:6])
-                            pub_date_formatted = pub_date_obj.strftime('%B %d, %Y')
-                        else:
-                            pub_date_formatted = pub_date
-                        
-                        summary = entry.get('summary', 'No description available')
-                        if len(summary) > 250:
-                            summary = summary[:250] + '...'
-                        
-                        # Extract job type and location from title or description
-                        title = entry.get('title', 'No Title')
-                        job_type = 'Full-time'
-                        location = 'Remote'
-                        
-                        if 'part-time' in title.lower() or 'part time' in summary.lower():
-                            job_type = 'Part-time'
-                        if 'contract' in title.lower() or 'freelance' in title.lower():
-                            job_type = 'Contract'
-                        
-                        job = {
-                            'id': hash(entry.get('link', '')),
-                            'title': title,
-                            'link': entry.get('link', '#'),
-                            'description': summary,
-                            'summary': summary,
-                            'published': pub_date_formatted,
-                            'published_date': pub_date_obj.isoformat() if pub_date_obj else None,
-                            'posted': pub_date_formatted,
-                            'source': 'Remotive',
-                            'budget': 'See job posting',
-                            'job_type': job_type,
-                            'location': location,
-                            'skills': []
-                        }
-                        jobs.append(job)
-                    except Exception as e:
-                        app.logger.error(f"Error parsing Remotive entry: {str(e)}")
-                        continue
-            except Exception as e:
-                app.logger.error(f"Error fetching Remotive feed: {str(e)}")
-        
-        # We Work Remotely RSS feed
-        if source in ['wwremote', 'all']:
-            try:
-                app.logger.info("Fetching We Work Remotely RSS feed")
-                wwr_url = "https://weworkremotely.com/remote-jobs.rss"
-                feed = feedparser.parse(wwr_url)
-                
-                for entry in feed.entries[:15]:
-                    try:
-                        pub_date = entry.get('published', 'N/A')
-                        pub_date_obj = None
-                        if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                            pub_date_obj = datetime(*entry.published_parsed[:6])
-                            pub_date_formatted = pub_date_obj.strftime('%B %d, %Y')
-                        else:
-                            pub_date_formatted = pub_date
-                        
-                        summary = entry.get('summary', 'No description available')
-                        if len(summary) > 250:
-                            summary = summary[:250] + '...'
-                        
-                        title = entry.get('title', 'No Title')
-                        job_type = 'Full-time'
-                        location = 'Anywhere'
-                        
-                        if 'part-time' in title.lower() or 'part time' in summary.lower():
-                            job_type = 'Part-time'
-                        if 'contract' in title.lower() or 'freelance' in title.lower():
-                            job_type = 'Contract'
-                        
-                        job = {
-                            'id': hash(entry.get('link', '') + 'wwr'),
-                            'title': title,
-                            'link': entry.get('link', '#'),
-                            'description': summary,
-                            'summary': summary,
-                            'published': pub_date_formatted,
-                            'published_date': pub_date_obj.isoformat() if pub_date_obj else None,
-                            'posted': pub_date_formatted,
-                            'source': 'We Work Remotely',
-                            'budget': 'See job posting',
-                            'job_type': job_type,
-                            'location': location,
-                            'skills': []
-                        }
-                        jobs.append(job)
-                    except Exception as e:
-                        app.logger.error(f"Error parsing WWR entry: {str(e)}")
-                        continue
-            except Exception as e:
-                app.logger.error(f"Error fetching WWR feed: {str(e)}")
-        
-        if not jobs:
+        try:
+            query = parse_search_query(request.args)
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'error': 'No jobs found from any source',
+                'error': str(e),
                 'jobs': []
-            }), 404
+            }), 400
         
-        # Sort by publish date (newest first)
-        jobs.sort(key=lambda x: x.get('published_date') or '', reverse=True)
+        with metrics.span('search'):
+            jobs, next_offset = search_jobs(**query)
         
         return jsonify({
             'success': True,
             'count': len(jobs),
-            'source': source,
+            'query': query['text'],
+            'next_offset': next_offset,
             'jobs': jobs
         })
     
     except Exception as e:
-        app.logger.error(f"Error fetching remote jobs: {str(e)}")
+        app.logger.error(f"Error searching jobs: {str(e)}")
         return jsonify({
             'success': False,
-            'error': f'Failed to fetch jobs: {str(e)}',
+            'error': f'Failed to search jobs: {str(e)}',
             'jobs': []
         }), 500
 
@@ -0,0 +1,235 @@
+"""
+End-to-end latency benchmark, fully offline.
+
+Runs the Flask app on a local port with Gemini replaced by a fake of
+configurable latency and the job boards served from recorded fixtures by a
+local RSS server, then drives /api/generate-proposal, /api/generate-application,
+/api/jobs and /api/generate-application/bulk (BULK_JOBS stored jobs per
+request) at increasing concurrency. For each scenario and level it
+reports p50/p95/p99 latency, throughput, errors and upstream calls (Gemini
+calls and feed fetches) per request.
+
+    python benchmarks/e2e.py
+    python benchmarks/e2e.py --scenarios application --concurrency 1,8,32 --gemini-latency 0.5
+    python benchmarks/e2e.py --repeat                      # same payload every time: measures caches
+    python benchmarks/e2e.py --assert-p95 application=2000 # exit 1 on regression
+
+No network access or API keys are needed. The shared Gemini rate limiter is
+opened up unless GEMINI_RPM / GEMINI_BURST are set in the environment.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fakes import FIXTURES, FakeFeedServer, FakeGemini, install_fake_gemini, point_sources_at  # noqa: E402
+
+SCENARIOS = ['proposal', 'application', 'jobs', 'bulk']
+
+# Stored jobs per request in the bulk scenario
+BULK_JOBS = 10
+
+# /api/jobs query strings cycled through by the jobs scenario
+JOB_QUERIES = ['limit=50', 'source=remotive', 'source=wwremote', 'job_type=Contract',
+               'location=US', 'location=Europe', 'date=week']
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of `values` (seconds) in milliseconds."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index] * 1000
+
+
+class Driver:
+    def __init__(self, base_url, resume, repeat=False):
+        self.base_url = base_url
+        self.resume = resume
+        self.repeat = repeat
+        self._next = 0
+        self._lock = threading.Lock()
+        self._job_ids = None
+
+    def payload_index(self):
+        if self.repeat:
+            return 0
+        with self._lock:
+            self._next += 1
+            return self._next
+
+    def request(self, scenario):
+        """Send one request; returns `(seconds, ok)`."""
+        index = self.payload_index()
+        job = {
+            'title': f'Senior Python Engineer #{index}',
+            'description': 'Build and scale our Flask APIs on AWS. PostgreSQL, Redis and Kubernetes experience required.',
+            'budget': '$3,000 - $5,000'
+        }
+        if scenario == 'proposal':
+            req = self._json_request('/api/generate-proposal', job)
+        elif scenario == 'application':
+            req = self._json_request('/api/generate-application', {'job': job, 'resume': self.resume})
+        elif scenario == 'bulk':
+            req = self._json_request('/api/generate-application/bulk', {
+                'job_ids': self.job_ids(),
+                'resume': self.resume,
+                'regenerate': not self.repeat
+            })
+        else:
+            query = JOB_QUERIES[index % len(JOB_QUERIES)]
+            req = urllib.request.Request(f'{self.base_url}/api/jobs?{query}',
+                                         headers={'Accept-Encoding': 'gzip'})
+
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=120) as response:
+                response.read()
+                ok = response.status < 400
+        except urllib.error.HTTPError as e:
+            e.read()
+            ok = False
+        except Exception:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    def job_ids(self):
+        """IDs of the first BULK_JOBS stored jobs (the first call ingests the fixture feeds)."""
+        with self._lock:
+            if self._job_ids is None:
+                with urllib.request.urlopen(f'{self.base_url}/api/jobs?limit={BULK_JOBS}', timeout=120) as response:
+                    self._job_ids = [job['id'] for job in json.loads(response.read())['jobs']]
+            return self._job_ids
+
+    def _json_request(self, path, body):
+        return urllib.request.Request(
+            f'{self.base_url}{path}',
+            data=json.dumps(body).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+
+
+def run_level(driver, scenario, concurrency, requests, gemini, feeds):
+    gemini_before, feeds_before = gemini.calls.value, feeds.requests.value
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: driver.request(scenario), range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies = [seconds for seconds, _ in results]
+    return {
+        'scenario': scenario,
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': sum(1 for _, ok in results if not ok),
+        'p50_ms': round(percentile(latencies, 50), 1),
+        'p95_ms': round(percentile(latencies, 95), 1),
+        'p99_ms': round(percentile(latencies, 99), 1),
+        'throughput_rps': round(requests / elapsed, 2),
+        'gemini_calls_per_request': round((gemini.calls.value - gemini_before) / requests, 2),
+        'feed_fetches_per_request': round((feeds.requests.value - feeds_before) / requests, 3)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline end-to-end latency benchmark')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument('--concurrency', default='1,4,16', help='comma-separated concurrency levels')
+    parser.add_argument('--requests', type=int, default=32, help='requests per scenario and level')
+    parser.add_argument('--gemini-latency', type=float, default=0.2, help='seconds per fake Gemini call')
+    parser.add_argument('--gemini-jitter', type=float, default=0.05, help='extra random seconds per call')
+    parser.add_argument('--feed-latency', type=float, default=0.05, help='seconds per fake feed request')
+    parser.add_argument('--repeat', action='store_true', help='send the same payload every time')
+    parser.add_argument('--assert-p95', action='append', default=[], metavar='SCENARIO=MS',
+                        help='fail if any level of SCENARIO has a p95 above MS')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args(argv)
+
+    scenarios = [name for name in args.scenarios.split(',') if name]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    levels = [int(level) for level in args.concurrency.split(',')]
+    budgets = {}
+    for item in args.assert_p95:
+        name, _, ms = item.partition('=')
+        budgets[name] = float(ms)
+
+    # Configuration is read at import time, so the environment is set up first
+    workdir = tempfile.mkdtemp(prefix='vigent-bench-')
+    os.environ.update({
+        'JOB_STORE_PATH': os.path.join(workdir, 'jobs.db'),
+        'TASK_STORE_PATH': os.path.join(workdir, 'tasks.db'),
+        'FEED_REFRESHER': 'false',
+        'GEMINI_API_KEY': 'offline-benchmark'
+    })
+    os.environ.pop('GENERATION_CACHE_DIR', None)
+    os.environ.pop('FEED_CACHE_PATH', None)
+    os.environ.setdefault('GEMINI_RPM', '1000000')
+    os.environ.setdefault('GEMINI_BURST', '1000000')
+
+    import logging
+    from werkzeug.serving import make_server
+    import app as flask_app
+
+    # Keep per-request access logs out of the results table
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    gemini = install_fake_gemini(FakeGemini(args.gemini_latency, args.gemini_jitter))
+    feeds = FakeFeedServer(args.feed_latency).start()
+    point_sources_at(feeds)
+
+    server = make_server('127.0.0.1', 0, flask_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    with open(os.path.join(FIXTURES, 'resume.txt')) as f:
+        driver = Driver(f'http://127.0.0.1:{server.server_port}', f.read(), repeat=args.repeat)
+
+    print(f"Fake Gemini {args.gemini_latency * 1000:.0f} ms/call (+{args.gemini_jitter * 1000:.0f} ms jitter), "
+          f"fake feeds {args.feed_latency * 1000:.0f} ms, {args.requests} requests per level"
+          f"{', repeated payload' if args.repeat else ''}\n")
+    header = f"{'scenario':12} {'conc':>4} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'gemini/req':>11} {'feeds/req':>10}"
+    print(header)
+    print('-' * len(header))
+
+    results = []
+    failures = []
+    try:
+        for scenario in scenarios:
+            for concurrency in levels:
+                result = run_level(driver, scenario, concurrency, args.requests, gemini, feeds)
+                results.append(result)
+                print(f"{scenario:12} {concurrency:>4} {result['errors']:>4} {result['p50_ms']:>9.1f} "
+                      f"{result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['throughput_rps']:>8.2f} "
+                      f"{result['gemini_calls_per_request']:>11.2f} {result['feed_fetches_per_request']:>10.3f}")
+                budget = budgets.get(scenario)
+                if budget is not None and result['p95_ms'] > budget:
+                    failures.append(f"{scenario} at concurrency {concurrency}: p95 {result['p95_ms']} ms > {budget} ms")
+                if result['errors']:
+                    failures.append(f"{scenario} at concurrency {concurrency}: {result['errors']} errors")
+    finally:
+        server.shutdown()
+        feeds.stop()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if failures:
+        print('\n' + '\n'.join(failures))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
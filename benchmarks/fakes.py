@@ -0,0 +1,158 @@
+"""
+Offline stand-ins for the upstreams: a fake Gemini model and a local RSS
+server serving the fixtures in benchmarks/fixtures. Both count their calls so
+benchmarks can report upstream calls per request.
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def increment(self):
+        with self._lock:
+            self.value += 1
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGemini:
+    """
+    Answers generate_content like Gemini would for this app's prompts: a JSON
+    array for interview questions, a JSON object for batched answers, prose
+    otherwise. Each call sleeps `latency` seconds (plus up to `jitter`);
+    streamed calls spread that time over their chunks.
+    """
+
+    def __init__(self, latency=0.2, jitter=0.05, model_name='models/fake-gemini'):
+        self.latency = latency
+        self.jitter = jitter
+        self.model_name = model_name
+        self.calls = Counter()
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls.increment()
+        text = self._reply(prompt if isinstance(prompt, str) else str(prompt))
+        delay = self.latency + random.uniform(0, self.jitter)
+        if stream:
+            return self._stream(text, delay)
+        time.sleep(delay)
+        return FakeResponse(text)
+
+    def _stream(self, text, delay):
+        words = text.split(' ')
+        chunks = [' '.join(words[i:i + 20]) + ' ' for i in range(0, len(words), 20)]
+        for chunk in chunks:
+            time.sleep(delay / len(chunks))
+            yield FakeResponse(chunk)
+
+    def _reply(self, prompt):
+        if 'Return ONLY a JSON array of questions' in prompt:
+            return json.dumps([
+                f"How have you used the core skills this role needs in past work? ({_tag(prompt)} {n})"
+                for n in range(1, 6)
+            ])
+        if 'Return ONLY a JSON object mapping each question' in prompt:
+            questions = json.loads(prompt.split('Interview Questions:\n', 1)[1].split('\n\n', 1)[0])
+            return json.dumps({question: _paragraph(2) for question in questions})
+        if 'Interview Question:' in prompt:
+            return _paragraph(2)
+        return _paragraph(12)
+
+
+class FakeFeedServer:
+    """
+    Threaded HTTP server serving fixtures/<source>.xml at /<source>.xml, with
+    ETag revalidation (304) and an optional per-request `latency`.
+    """
+
+    def __init__(self, latency=0.0, host='127.0.0.1', port=0):
+        self.latency = latency
+        self.requests = Counter()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.increment()
+                time.sleep(server.latency)
+                path = os.path.join(FIXTURES, os.path.basename(self.path.split('?')[0]))
+                if not path.endswith('.xml') or not os.path.exists(path):
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                with open(path, 'rb') as f:
+                    body = f.read()
+                etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/rss+xml')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://{host}:{self.httpd.server_address[1]}'
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+
+
+def install_fake_gemini(fake):
+    """Route every get_model() call to `fake`, behind the shared client's limits."""
+    from vigent import gemini
+    # Cached contents need the real API; prompts carry the resume inline instead
+    gemini.context_cache.enabled = False
+    with gemini._models_lock:
+        gemini._models[gemini.GEMINI_MODEL] = gemini.GeminiModel(fake)
+    return fake
+
+
+def point_sources_at(server):
+    """Serve every registered feed from the fake server's fixture of the same name."""
+    from vigent.feeds import SOURCES
+    for name, source in SOURCES.items():
+        source.url = f'{server.url}/{name}.xml'
+
+
+SENTENCES = [
+    "I have shipped production systems that match this role's requirements.",
+    "In my last position I owned features from design through deployment.",
+    "I communicate clearly in writing and work well across time zones.",
+    "I care about tests, observability and maintainable code.",
+    "I have mentored engineers and improved team delivery.",
+    "I enjoy turning ambiguous problems into simple, reliable solutions."
+]
+
+
+def _paragraph(sentences):
+    return ' '.join(random.choice(SENTENCES) for _ in range(sentences))
+
+
+def _tag(prompt):
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:6]
@@ -0,0 +1,101 @@
+"""
+Cold-start import benchmark for the serverless functions and the Flask app.
+
+Each entry point is loaded in a fresh interpreter under `python -X importtime`.
+The benchmark reports the import time it adds on top of a bare interpreter
+and its heaviest modules, and fails if any entry point exceeds its budget or
+imports a module it must not load at startup.
+
+    python benchmarks/importtime.py            # check all entry points
+    python benchmarks/importtime.py api/jobs.py --runs 5 --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry point -> import time budget in milliseconds (median over runs, excluding
+# the interpreter's own startup). Raise a budget deliberately, never to silence a run.
+BUDGETS = {
+    'api/test.py': 60,
+    'api/jobs.py': 110,
+    'api/jobs/search.py': 110,
+    'api/generate-application.py': 110,
+    'api/generate-application/stream.py': 110,
+    'app.py': 350
+}
+
+# Heavy modules that must load on first use, not at startup
+LAZY_MODULES = ['google.generativeai', 'google.genai', 'numpy', 'feedparser']
+
+# Entry point -> modules it may import eagerly anyway
+ALLOWED = {}
+
+
+def measure(entry, runs=3):
+    """Return `(median_ms, {module: self_us})` for loading `entry` in a fresh interpreter."""
+    totals = []
+    modules = {}
+    for _ in range(runs):
+        baseline = _import_times('pass')
+        loaded = _import_times(f"import runpy; runpy.run_path({entry!r}, run_name='__importtime__')")
+        added = {name: self_us for name, self_us in loaded.items() if name not in baseline}
+        totals.append(sum(added.values()) / 1000)
+        modules = added
+    totals.sort()
+    return totals[len(totals) // 2], modules
+
+
+def _import_times(code):
+    env = dict(os.environ, FEED_REFRESHER='false', PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(self_us)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('entries', nargs='*', help='entry points to check (default: all budgeted)')
+    parser.add_argument('--runs', type=int, default=3, help='fresh interpreters per entry point')
+    parser.add_argument('--top', type=int, default=8, help='heaviest modules to list')
+    args = parser.parse_args(argv)
+
+    failures = []
+    for entry in args.entries or list(BUDGETS):
+        budget = BUDGETS.get(entry)
+        total_ms, modules = measure(entry, args.runs)
+        eager = [
+            name for name in LAZY_MODULES
+            if name in modules and name not in ALLOWED.get(entry, [])
+        ]
+        over = budget is not None and total_ms > budget
+        status = 'FAIL' if over or eager else 'ok'
+        print(f"{status:4} {entry}: {total_ms:.1f} ms (budget {budget if budget is not None else '-'} ms)")
+        for name, self_us in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"       {self_us / 1000:7.1f} ms  {name}")
+        if eager:
+            print(f"       imports at startup: {', '.join(eager)}")
+        if status == 'FAIL':
+            failures.append(entry)
+
+    if failures:
+        print(f"\nImport time regressions: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
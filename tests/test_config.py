@@ -0,0 +1,39 @@
+"""
+Settings in .env must reach the vigent modules, which read the environment
+when they are imported.
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SETTINGS = ['GENERATION_CONCURRENCY', 'FEED_REFRESHER', 'JOB_STORE_PATH']
+
+
+def test_dotenv_settings_apply_to_vigent_modules(tmp_path):
+    store_path = str(tmp_path / 'jobs.db')
+    (tmp_path / '.env').write_text(
+        'GENERATION_CONCURRENCY=1\n'
+        'FEED_REFRESHER=false\n'
+        f'JOB_STORE_PATH={store_path}\n'
+    )
+    code = (
+        f"import json, sys; sys.path.insert(0, {ROOT!r}); import app\n"
+        "from vigent import generation, refresher\n"
+        "from vigent.store import job_store\n"
+        "print(json.dumps([generation.GENERATION_CONCURRENCY, refresher.FEED_REFRESHER,"
+        " job_store.path, refresher._refresher is None]))"
+    )
+    env = {name: value for name, value in os.environ.items() if name not in SETTINGS}
+    # `python -c` makes load_dotenv() look for .env in the working directory
+    result = subprocess.run([sys.executable, '-c', code], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+
+    concurrency, refresher_enabled, path, not_started = json.loads(result.stdout.strip().splitlines()[-1])
+    assert concurrency == 1
+    assert refresher_enabled is False
+    assert path == store_path
+    assert not_started
@@ -0,0 +1,89 @@
+"""
+rss.iter_entries must give the entries feedparser gives for the recorded
+board feeds, and stop reading as soon as the caller stops iterating.
+"""
+import gzip
+import io
+import os
+import sys
+
+import feedparser
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from vigent import rss
+
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+
+FEEDS = ['remotive.xml', 'wwremote.xml']
+
+FIELDS = ['title', 'link', 'summary', 'id', 'published', 'region']
+
+
+class Response(io.BytesIO):
+    """A download that counts how many bytes were read."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('name', FEEDS)
+def test_entries_match_feedparser(name):
+    data = read_fixture(name)
+    expected = feedparser.parse(data).entries
+    entries = list(rss.iter_entries(Response(data)))
+
+    assert len(entries) == len(expected) > 0
+    for entry, reference in zip(entries, expected):
+        for field in FIELDS:
+            assert entry.get(field) == reference.get(field), field
+        assert [tag['term'] for tag in entry.get('tags', [])] == \
+            [tag['term'] for tag in reference.get('tags', [])]
+        # feedparser sets tm_isdst=0 where timetuple() gives -1; the instant is what matters
+        assert tuple(entry['published_parsed'])[:6] == tuple(reference['published_parsed'])[:6]
+
+
+def test_gzipped_response_and_stats():
+    data = read_fixture('remotive.xml')
+    compressed = gzip.compress(data)
+    stats = rss.FeedStats()
+    entries = list(rss.iter_entries(Response(compressed), stats, gzipped=True))
+
+    assert entries == list(rss.iter_entries(Response(data)))
+    assert stats.entries == len(entries)
+    assert stats.bytes == len(compressed)
+
+
+def test_stopping_early_leaves_the_rest_unread():
+    # Large enough to need several reads
+    data = read_fixture('wwremote.xml')
+    item_start = data.index(b'<item>')
+    item_end = data.rindex(b'</item>') + len(b'</item>')
+    items = data[item_start:item_end]
+    data = data[:item_start] + items * (4 * rss.READ_CHUNK_BYTES // len(items) + 1) + data[item_end:]
+
+    response = Response(data)
+    entries = rss.iter_entries(response)
+    first = next(entries)
+    entries.close()
+
+    assert first['title']
+    assert response.bytes_read < len(data) // 2
+
+
+def test_malformed_feed_raises_parse_error():
+    with pytest.raises(rss.ParseError):
+        list(rss.iter_entries(Response(b'<rss><channel><item><title>x</item>')))
@@ -0,0 +1,107 @@
+"""
+Rendered job lists are revalidated by ETag: a client holding any coding's
+tag gets a 304, and the tag only changes when the jobs do.
+"""
+import gzip
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from vigent.snapshots import Snapshot, SnapshotCache, etag_matches
+
+
+def payload(latency_ms=12, status='ok'):
+    return {
+        'success': True,
+        'count': 20,
+        'sources': {'remotive': {'status': status, 'count': 20, 'latency_ms': latency_ms}},
+        'jobs': [{'id': f'job-{index}', 'title': 'Python Developer ' * 10} for index in range(20)]
+    }
+
+
+def test_each_coding_has_its_own_etag_and_body():
+    snapshot = Snapshot(200, payload())
+    status, headers, body = snapshot.response('gzip')
+    assert status == 200
+    assert headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(body) == snapshot.bodies['identity']
+
+    identity_headers = snapshot.response(None)[1]
+    assert 'Content-Encoding' not in identity_headers
+    assert len(set(snapshot.etags.values())) == len(snapshot.bodies)
+    assert headers['ETag'] != identity_headers['ETag']
+
+
+def test_any_codings_etag_revalidates():
+    snapshot = Snapshot(200, payload())
+    for etag in snapshot.etags.values():
+        status, headers, body = snapshot.response('gzip, br', if_none_match=etag)
+        assert status == 304
+        assert body == b''
+        assert headers['ETag'] == snapshot.etags[snapshot.encoding_for('gzip, br')]
+
+    status, _, body = snapshot.response('gzip', if_none_match='"stale"')
+    assert status == 200
+    assert body
+
+
+def test_etag_ignores_source_latency():
+    first = Snapshot(200, payload(latency_ms=12))
+    second = Snapshot(200, payload(latency_ms=340))
+    assert first.etags == second.etags
+    assert second.response(None, if_none_match=first.etags['identity'])[0] == 304
+
+    changed = payload()
+    changed['jobs'] = changed['jobs'][1:]
+    assert Snapshot(200, changed).etags['identity'] != first.etags['identity']
+
+
+def test_etag_matching():
+    etag = '"abc"'
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"other", W/"abc"', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches('"abcd"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_cache_keeps_successes_only():
+    cache = SnapshotCache(max_entries=2, ttl=60)
+    renders = []
+
+    def render(status, source_status='ok'):
+        def render_once():
+            renders.append(status)
+            return status, payload(status=source_status)
+        return render_once
+
+    first = cache.get('ok', render(200))
+    assert cache.get('ok', render(200)) is first
+    assert first.cache_control.startswith('public')
+
+    # A 404 or a failed source is re-rendered on every request, and never cached downstream
+    for key, args in [('missing', (404,)), ('partial', (200, 'error'))]:
+        snapshot = cache.get(key, render(*args))
+        assert snapshot.cache_control == 'no-cache'
+        assert cache.get(key, render(*args)) is not snapshot
+    assert renders == [200, 404, 404, 200, 200]
+
+
+def test_cache_evicts_least_recently_used_and_expired():
+    def render():
+        return 200, payload()
+
+    cache = SnapshotCache(max_entries=2, ttl=60)
+    a = cache.get('a', render)
+    cache.get('b', render)
+    cache.get('a', render)
+    cache.get('c', render)
+    assert cache.get('a', render) is a
+    assert list(cache._snapshots) == ['c', 'a']
+
+    expired = SnapshotCache(ttl=0)
+    first = expired.get('a', render)
+    assert expired.get('a', render) is not first
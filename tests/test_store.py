@@ -0,0 +1,129 @@
+"""
+The job store pages through jobs newest first with an opaque cursor and
+applies the same filters to listing and full-text search.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from vigent.store import JobStore, decode_cursor, encode_cursor, fts_query
+
+
+def make_job(index, **fields):
+    job = {
+        'id': f'job-{index:02d}',
+        'link': f'https://example.com/jobs/{index}',
+        'title': f'Engineer {index}',
+        'description': 'Build things.',
+        'published_date': f'2026-10-{index:02d}T12:00:00+00:00',
+        'job_type': 'Full-time',
+        'location': 'Worldwide'
+    }
+    job.update(fields)
+    return job
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    store.upsert_jobs('remotive', [make_job(index) for index in range(1, 8)])
+    store.upsert_jobs('wwremote', [
+        make_job(8, job_type='Contract', location='USA'),
+        make_job(9, location='Europe'),
+        # Same date as job-09: the cursor must still order (and not skip) it
+        make_job(10, published_date='2026-10-09T12:00:00+00:00'),
+        make_job(11, published_date=None)
+    ])
+    return store
+
+
+def test_upsert_returns_only_new_jobs(store):
+    new_jobs = store.upsert_jobs('remotive', [make_job(1), make_job(20)])
+    assert [job['id'] for job in new_jobs] == ['job-20']
+
+
+def test_cursor_pages_cover_every_job_once_newest_first(store):
+    everything, next_cursor = store.list_jobs()
+    assert next_cursor is None
+
+    pages = []
+    cursor = None
+    while True:
+        jobs, cursor = store.list_jobs(limit=3, cursor=cursor)
+        assert len(jobs) <= 3
+        pages.append(jobs)
+        if cursor is None:
+            break
+
+    ids = [job['id'] for page in pages for job in page]
+    assert ids == [job['id'] for job in everything]
+    assert len(ids) == len(set(ids)) == 11
+    # Newest first, ties broken by id, undated jobs last
+    assert ids[:3] == ['job-10', 'job-09', 'job-08']
+    assert ids[-1] == 'job-11'
+
+
+def test_last_full_page_has_no_cursor(store):
+    jobs, next_cursor = store.list_jobs(limit=11)
+    assert len(jobs) == 11
+    assert next_cursor is None
+
+
+def test_cursor_round_trip_and_malformed_cursor():
+    assert decode_cursor(encode_cursor('2026-10-01', 'a|b')) == ('2026-10-01', 'a|b')
+    with pytest.raises(ValueError):
+        decode_cursor('not a cursor!')
+
+
+def test_filters(store):
+    def ids(**filters):
+        return sorted(job['id'] for job in store.list_jobs(**filters)[0])
+
+    assert ids(sources=['wwremote']) == ['job-08', 'job-09', 'job-10', 'job-11']
+    assert ids(sources=[]) == []
+    assert ids(job_type='Contract') == ['job-08']
+    assert ids(location='Europe') == ['job-09']
+    # Exact match: 'US' is not a substring search
+    assert ids(location='US') == []
+    # Undated jobs are kept by the date filter
+    assert ids(since='2026-10-08T00:00:00+00:00') == ['job-08', 'job-09', 'job-10', 'job-11']
+    assert ids(sources=['remotive'], since='2026-10-06T00:00:00+00:00') == ['job-06', 'job-07']
+
+
+def test_filters_apply_to_cursor_pages(store):
+    first, cursor = store.list_jobs(sources=['wwremote'], limit=2)
+    second, cursor_after = store.list_jobs(sources=['wwremote'], limit=2, cursor=cursor)
+    assert [job['id'] for job in first + second] == ['job-10', 'job-09', 'job-08', 'job-11']
+    assert cursor_after is None
+
+
+def test_fts_query():
+    assert fts_query('Python Developer') == '"python" "developer"*'
+    assert fts_query('c++ "senior"') == '"c" "senior"*'
+    assert fts_query('*** ()') is None
+
+
+def test_search_ranks_title_matches_first_and_filters(store):
+    store.upsert_jobs('remotive', [
+        make_job(21, title='Backend Engineer', description='Python services.'),
+        make_job(22, title='Python Developer', description='Django and APIs.'),
+        make_job(23, title='Designer', description='Figma.')
+    ])
+    jobs, has_more = store.search_jobs('python')
+    assert [job['id'] for job in jobs] == ['job-22', 'job-21']
+    assert jobs[0]['score'] > jobs[1]['score']
+    assert not has_more
+
+    # Prefix match on the last word
+    assert [job['id'] for job in store.search_jobs('pyth')[0]] == ['job-22', 'job-21']
+
+    jobs, has_more = store.search_jobs('python', limit=1)
+    assert [job['id'] for job in jobs] == ['job-22']
+    assert has_more
+
+    assert store.search_jobs('python', sources=['wwremote']) == ([], False)
+    assert store.search_jobs('!!!') == ([], False)
@@ -0,0 +1,5 @@
+"""
+Shared backend code for Vigent.
+
+Used by both the Flask app (app.py) and the Vercel serverless functions in api/.
+"""
@@ -0,0 +1,279 @@
+"""
+Application packages for several stored jobs at once, for one resume.
+
+The resume is preprocessed (and context-cached) once for the whole batch, and
+every Gemini call for every job goes through one bounded pool, so a batch
+takes about as long as the rate limit allows instead of one package after
+another. Answers only depend on the question and the resume, so a question
+asked for several jobs is answered once and shared.
+"""
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from vigent.generation import (
+    GENERATION_BATCH_ANSWERS, MAX_QUESTIONS, GenerationError, ResumeSession, answer_prompt,
+    answers_prompt, application_cache_key, application_package, cached_questions, cover_letter_prompt,
+    parse_answers, parse_questions, questions_prompt, remaining, remember_package, remember_questions,
+    response_text, submit_call
+)
+from vigent.generation_cache import generation_cache
+from vigent.store import job_store
+
+logger = logging.getLogger(__name__)
+
+# Most jobs in one bulk request
+BULK_MAX_JOBS = int(os.environ.get('BULK_MAX_JOBS', '20'))
+
+# Gemini calls in flight for one bulk request, across all its jobs
+BULK_CONCURRENCY = int(os.environ.get('BULK_CONCURRENCY', '8'))
+
+# Seconds allowed for a whole batch; jobs unfinished by then fail with a 504
+BULK_DEADLINE = float(os.environ.get('BULK_DEADLINE', '90'))
+
+
+def parse_bulk_request(data):
+    """Validate a bulk request body; returns `(job_ids, resume)` or raises ValueError."""
+    job_ids = data.get('job_ids')
+    if not isinstance(job_ids, list) or not job_ids or not all(isinstance(i, str) for i in job_ids):
+        raise ValueError('job_ids must be a non-empty list of job IDs')
+    # Keep the first occurrence of each ID, in order
+    job_ids = list(dict.fromkeys(job_ids))
+    if len(job_ids) > BULK_MAX_JOBS:
+        raise ValueError(f'At most {BULK_MAX_JOBS} jobs can be generated at once')
+    resume = data.get('resume', '')
+    if not resume:
+        raise ValueError('Resume text is required')
+    return job_ids, resume
+
+
+class BulkRun:
+    """
+    The state of one bulk request. Only the thread iterating events() touches
+    it; pool threads just run Gemini calls and return their responses.
+    """
+
+    def __init__(self, model, jobs, resume, executor, batch_answers, expires_at):
+        self.model = model
+        self.expires_at = expires_at
+        self.session = ResumeSession(model, resume)
+        self.resume = resume
+        self.executor = executor
+        self.batch_answers = batch_answers
+        self.jobs = {job['id']: job for job in jobs}
+        self.cover_letters = {}
+        self.questions = {}
+        # Question key -> answer text, or None once it has failed for good
+        self.answers = {}
+        self.answering = set()
+        self.retried = set()
+        self.pending = {}
+
+    def start(self):
+        for job_id, job in self.jobs.items():
+            title, description = job.get('title', ''), job.get('description', '')
+            self._submit('cover_letter', job_id, self.session.model.generate_content,
+                         cover_letter_prompt(title, description, self.session.context('cover_letter')))
+            questions_list = cached_questions(self.model, title, description)
+            if questions_list is None:
+                self._submit('questions', job_id, self.model.generate_content,
+                             questions_prompt(title, description))
+            else:
+                self._set_questions(job_id, questions_list)
+
+    def events(self):
+        """Yield `(job_id, package)` as each job completes, then raise TimeoutError for the rest."""
+        while self.jobs:
+            done, _ = wait(list(self.pending), timeout=remaining(self.expires_at), return_when=FIRST_COMPLETED)
+            if not done:
+                raise TimeoutError
+            for future in done:
+                kind, target = self.pending.pop(future)
+                self._handle(kind, target, future)
+            yield from self._finished()
+
+    def partial(self):
+        """`(job_id, package or None)` for outstanding jobs once the deadline passes."""
+        for job_id in list(self.jobs):
+            if job_id in self.cover_letters and job_id in self.questions:
+                yield job_id, self._package(job_id)
+            else:
+                yield job_id, None
+
+    def _handle(self, kind, target, future):
+        error = future.exception()
+        text = None if error else response_text(future.result())
+        if error:
+            logger.error(f"Error generating {kind} in bulk: {str(error)}")
+
+        if kind == 'cover_letter':
+            self.cover_letters[target] = text
+        elif kind == 'questions':
+            questions_list = parse_questions(text)[:MAX_QUESTIONS] if text else None
+            if questions_list:
+                job = self.jobs[target]
+                remember_questions(self.model, job.get('title', ''), job.get('description', ''), questions_list)
+            self._set_questions(target, questions_list)
+        elif kind == 'answers':
+            answers = parse_answers(text, target) if text else {}
+            for question in target:
+                self.answering.discard(_question_key(question))
+                if question in answers:
+                    self.answers[_question_key(question)] = answers[question]
+            # Only retry the questions the batched call missed, one call each
+            missing = [q for q in target if _question_key(q) not in self.answers]
+            self._answer(missing, batch=False)
+        else:
+            key = _question_key(target)
+            self.answering.discard(key)
+            self.answers[key] = text.strip() if text else None
+
+    def _set_questions(self, job_id, questions_list):
+        self.questions[job_id] = questions_list
+        if questions_list:
+            self._answer([q for q in questions_list if _question_key(q) not in self.answers])
+
+    def _answer(self, questions, batch=None):
+        """Request answers for `questions` not already answered or in flight."""
+        batch = self.batch_answers if batch is None else batch
+        new = []
+        for question in questions:
+            key = _question_key(question)
+            if key in self.answers or key in self.answering:
+                continue
+            if not batch:
+                # Each question gets one individual attempt
+                if key in self.retried:
+                    self.answers[key] = None
+                    continue
+                self.retried.add(key)
+            self.answering.add(key)
+            new.append(question)
+        if not new:
+            return
+        if batch:
+            self._submit('answers', new, self.session.model.generate_content,
+                         answers_prompt(new, self.session.context('answers')))
+        else:
+            for question in new:
+                self._submit('answer', question, self.session.model.generate_content,
+                             answer_prompt(question, self.session.context('answer', question)))
+
+    def _finished(self):
+        for job_id in list(self.jobs):
+            if job_id not in self.cover_letters or job_id not in self.questions:
+                continue
+            if not self.cover_letters[job_id]:
+                self.jobs.pop(job_id)
+                yield job_id, GenerationError('Failed to generate cover letter')
+            elif not self.questions[job_id]:
+                self.jobs.pop(job_id)
+                yield job_id, GenerationError('Failed to generate interview questions')
+            elif all(_question_key(q) in self.answers for q in self.questions[job_id]):
+                yield job_id, self._package(job_id)
+
+    def _package(self, job_id):
+        job = self.jobs.pop(job_id)
+        questions_list = self.questions[job_id]
+        answers = {q: self.answers.get(_question_key(q)) for q in questions_list}
+        key = application_cache_key(self.model, job.get('title', ''), job.get('description', ''), self.resume)
+        return remember_package(key, application_package(self.cover_letters[job_id], questions_list, answers))
+
+    def _submit(self, kind, target, fn, prompt):
+        self.pending[submit_call(self.executor, kind, fn, prompt, deadline=self.expires_at)] = (kind, target)
+
+
+def bulk_application_events(model, job_ids, resume, regenerate=False,
+                            concurrency=None, deadline=None, batch_answers=None, store=None):
+    """
+    Yield `(event, data)` pairs for the application packages of the stored
+    jobs `job_ids`, in completion order:
+
+    - 'application': {'job_id', 'success', 'cover_letter', 'questions', 'cached'}
+      for each finished job, or {'job_id', 'success': False, 'error', 'status'}
+      for a job that is unknown or failed
+    - 'done': {'count', 'failed'}
+
+    Packages already in the generation cache are sent first (unless
+    `regenerate`). The rest share one ResumeSession and one pool of
+    `concurrency` workers, reuse question sets from the question cache, and
+    each distinct question is answered once.
+    Jobs still missing a cover letter or questions after `deadline` seconds
+    fail with a 504; answers still pending get the fallback answer.
+    """
+    store = store or job_store
+    concurrency = max(1, concurrency or BULK_CONCURRENCY)
+    deadline = deadline or BULK_DEADLINE
+    if batch_answers is None:
+        batch_answers = GENERATION_BATCH_ANSWERS
+    expires_at = time.monotonic() + deadline
+
+    jobs = {job['id']: job for job in store.get_jobs(job_ids)}
+    failed = 0
+    to_generate = []
+    for job_id in job_ids:
+        job = jobs.get(job_id)
+        if job is None:
+            failed += 1
+            yield 'application', _error_event(job_id, GenerationError('Job not found', 404))
+            continue
+        package = None
+        if not regenerate:
+            key = application_cache_key(model, job.get('title', ''), job.get('description', ''), resume)
+            package = generation_cache.get(key)
+        if package is not None:
+            yield 'application', _package_event(job_id, package, cached=True)
+        else:
+            to_generate.append(job)
+
+    if to_generate:
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            run = BulkRun(model, to_generate, resume, executor, batch_answers, expires_at)
+            run.start()
+            try:
+                for job_id, result in run.events():
+                    if isinstance(result, GenerationError):
+                        failed += 1
+                        yield 'application', _error_event(job_id, result)
+                    else:
+                        yield 'application', _package_event(job_id, result, cached=False)
+            except TimeoutError:
+                logger.warning(f"Bulk deadline reached with {len(run.jobs)} jobs outstanding")
+                for job_id, package in run.partial():
+                    if package is None:
+                        failed += 1
+                        yield 'application', _error_event(
+                            job_id, GenerationError('Timed out generating application', 504))
+                    else:
+                        yield 'application', _package_event(job_id, package, cached=False)
+        finally:
+            # Don't block the response on calls that missed the deadline
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    yield 'done', {'count': len(job_ids), 'failed': failed}
+
+
+def _package_event(job_id, package, cached):
+    return {
+        'job_id': job_id,
+        'success': True,
+        'cover_letter': package['cover_letter'],
+        'questions': package['questions'],
+        'cached': cached
+    }
+
+
+def _error_event(job_id, error):
+    return {
+        'job_id': job_id,
+        'success': False,
+        'error': error.message,
+        'status': error.status
+    }
+
+
+def _question_key(question):
+    """Questions that differ only in case or spacing are answered once."""
+    return ' '.join(question.lower().split())
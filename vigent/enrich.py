@@ -0,0 +1,236 @@
+"""
+Job enrichment run once per new job at ingestion: skills extracted from the
+posting, and the job type and region classified, so the dashboard filters and
+skill tags work on stored data instead of per-request string scanning.
+
+Keyword lookups use Aho-Corasick automata compiled once at import, so each
+posting is scanned in a single pass whatever the vocabulary size.
+"""
+import re
+
+from vigent.vectorize import TAG_RE
+
+# Canonical skill -> lowercase spellings found in postings
+SKILLS = {
+    'Python': ['python'],
+    'JavaScript': ['javascript', 'js', 'es6'],
+    'TypeScript': ['typescript'],
+    'Java': ['java'],
+    'Kotlin': ['kotlin'],
+    'Scala': ['scala'],
+    'Go': ['golang'],
+    'Rust': ['rust'],
+    'C++': ['c++', 'cpp'],
+    'C#': ['c#', 'csharp'],
+    '.NET': ['.net', 'dotnet', 'asp.net'],
+    'PHP': ['php'],
+    'Ruby': ['ruby'],
+    'Ruby on Rails': ['rails', 'ruby on rails', 'ror'],
+    'Swift': ['swift'],
+    'Objective-C': ['objective-c'],
+    'Elixir': ['elixir'],
+    'Haskell': ['haskell'],
+    'SQL': ['sql'],
+    'HTML': ['html', 'html5'],
+    'CSS': ['css', 'css3', 'sass', 'scss', 'tailwind', 'tailwindcss'],
+    'React': ['react', 'react.js', 'reactjs'],
+    'React Native': ['react native'],
+    'Next.js': ['next.js', 'nextjs'],
+    'Vue': ['vue', 'vue.js', 'vuejs', 'nuxt'],
+    'Angular': ['angular', 'angularjs'],
+    'Svelte': ['svelte', 'sveltekit'],
+    'Node.js': ['node', 'node.js', 'nodejs'],
+    'Express': ['express.js', 'expressjs'],
+    'Django': ['django'],
+    'Flask': ['flask'],
+    'FastAPI': ['fastapi'],
+    'Spring': ['spring boot', 'spring framework'],
+    'Laravel': ['laravel'],
+    'GraphQL': ['graphql'],
+    'REST APIs': ['restful', 'rest api', 'rest apis'],
+    'gRPC': ['grpc'],
+    'PostgreSQL': ['postgres', 'postgresql'],
+    'MySQL': ['mysql'],
+    'MongoDB': ['mongodb', 'mongo'],
+    'Redis': ['redis'],
+    'Elasticsearch': ['elasticsearch', 'opensearch'],
+    'Kafka': ['kafka'],
+    'RabbitMQ': ['rabbitmq'],
+    'Snowflake': ['snowflake'],
+    'Spark': ['spark', 'pyspark'],
+    'Airflow': ['airflow'],
+    'dbt': ['dbt'],
+    'AWS': ['aws', 'amazon web services'],
+    'GCP': ['gcp', 'google cloud'],
+    'Azure': ['azure'],
+    'Docker': ['docker'],
+    'Kubernetes': ['kubernetes', 'k8s'],
+    'Terraform': ['terraform'],
+    'Ansible': ['ansible'],
+    'CI/CD': ['ci/cd', 'github actions', 'gitlab ci', 'jenkins', 'circleci'],
+    'Linux': ['linux'],
+    'Git': ['git', 'github', 'gitlab'],
+    'iOS': ['ios'],
+    'Android': ['android'],
+    'Flutter': ['flutter'],
+    'Machine Learning': ['machine learning', 'ml', 'deep learning'],
+    'AI': ['ai', 'artificial intelligence', 'llm', 'llms', 'generative ai', 'genai'],
+    'NLP': ['nlp', 'natural language processing'],
+    'PyTorch': ['pytorch'],
+    'TensorFlow': ['tensorflow'],
+    'Pandas': ['pandas'],
+    'Data Analysis': ['data analysis', 'data analytics', 'analytics'],
+    'Figma': ['figma'],
+    'UI/UX': ['ui/ux', 'ux', 'ui design', 'user experience'],
+    'WordPress': ['wordpress'],
+    'Shopify': ['shopify'],
+    'Salesforce': ['salesforce'],
+    'SEO': ['seo'],
+    'Excel': ['microsoft excel', 'ms excel', 'excel spreadsheets'],
+    'Agile': ['agile', 'scrum']
+}
+
+# Most skills a job is tagged with
+MAX_SKILLS = 10
+
+# Job type -> spellings, most specific first (the first type found wins)
+JOB_TYPES = {
+    'Contract': ['contract', 'contractor', 'freelance', 'freelancer', 'temporary', 'fixed-term'],
+    'Part-time': ['part-time', 'part time', 'parttime'],
+    'Full-time': ['full-time', 'full time', 'fulltime', 'permanent']
+}
+
+DEFAULT_JOB_TYPE = 'Full-time'
+
+# Region (the dashboard's location filter values) -> spellings
+REGIONS = {
+    'US': ['usa', 'united states', 'us only', 'us-only', 'us-based', 'us based', 'u.s.',
+           'us citizens', 'us timezones', 'us time zones', 'north america'],
+    'Europe': ['europe', 'european', 'eu', 'emea', 'uk', 'united kingdom', 'cet', 'cest',
+               'germany', 'france', 'spain', 'portugal', 'netherlands', 'poland', 'ireland'],
+    'Anywhere': ['anywhere', 'worldwide', 'anywhere in the world', 'any location',
+                 'work from anywhere']
+}
+
+# A bare "US" is only trusted in titles ("Senior Engineer (US)"), where it can't be "join us"
+TITLE_US_RE = re.compile(r'\bUS\b')
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over lowercase keywords, each mapped to a value.
+    find() reports whole-word matches only, so 'java' doesn't match inside
+    'javascript' and 'ai' doesn't match inside 'email'.
+    """
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for keyword, value in keywords.items():
+            self._add(keyword, value)
+        self._link()
+
+    def find(self, text):
+        """Yield `(start, end, value)` for each whole-word keyword match in `text` (lowercased)."""
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for length, value in self.output[state]:
+                start = index - length + 1
+                end = index + 1
+                if _boundary(text, start - 1) and _boundary(text, end):
+                    yield start, end, value
+
+    def values(self, text):
+        """Distinct matched values in order of first appearance."""
+        seen = []
+        for _, _, value in self.find(text):
+            if value not in seen:
+                seen.append(value)
+        return seen
+
+    def _add(self, keyword, value):
+        state = 0
+        for char in keyword:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.output[state].append((len(keyword), value))
+
+    def _link(self):
+        # Breadth-first, so each state's failure target is already linked
+        queue = list(self.goto[0].values())
+        while queue:
+            state = queue.pop(0)
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+
+def _keywords(vocabulary):
+    return {
+        spelling: value
+        for value, spellings in vocabulary.items()
+        for spelling in spellings
+    }
+
+
+skill_automaton = KeywordAutomaton(_keywords(SKILLS))
+job_type_automaton = KeywordAutomaton(_keywords(JOB_TYPES))
+region_automaton = KeywordAutomaton(_keywords(REGIONS))
+
+
+def extract_skills(text):
+    return skill_automaton.values(_plain(text))[:MAX_SKILLS]
+
+
+def classify_job_type(title, text=''):
+    """Job type named in the title, else in the text, else DEFAULT_JOB_TYPE."""
+    for part in [title, text]:
+        found = job_type_automaton.values(_plain(part))
+        if found:
+            return min(found, key=list(JOB_TYPES).index)
+    return DEFAULT_JOB_TYPE
+
+
+def classify_region(title, text='', region=None, default='Remote'):
+    """
+    Region for the location filter (US, Europe or Anywhere), from the feed's
+    own region field if it has one, then the title, then the text. Postings
+    that don't say fall back to `default` (the source's location).
+    """
+    if TITLE_US_RE.search(title or ''):
+        return 'US'
+    for part in [region, title, text]:
+        found = region_automaton.values(_plain(part))
+        if found:
+            return found[0]
+    return default
+
+
+def enrich_job(job, text, region=None, default_location='Remote'):
+    """Fill the job's skills, job_type and location from its full posting `text`."""
+    title = job.get('title', '')
+    job['skills'] = extract_skills(f"{title} {text}")
+    job['job_type'] = classify_job_type(title, text)
+    job['location'] = classify_region(title, text, region, default_location)
+    return job
+
+
+def _plain(text):
+    return TAG_RE.sub(' ', text or '').lower()
+
+
+def _boundary(text, index):
+    return index < 0 or index >= len(text) or not text[index].isalnum()
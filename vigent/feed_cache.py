@@ -0,0 +1,144 @@
+"""
+In-memory feed cache with per-source TTL and stale-while-revalidate refresh.
+
+Readers always get the last good snapshot right away. Once a snapshot is
+older than its TTL a single background refresh is started; only a source
+that has never been fetched (or is older than FEED_CACHE_MAX_STALE) blocks
+the caller. Snapshots can optionally be mirrored to a JSON file so they
+survive cold starts.
+
+Each snapshot also keeps the HTTP validators (ETag / Last-Modified) it was
+fetched with. Loaders receive them and may raise NotModified to keep the
+current value without re-parsing anything.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds a snapshot is served without triggering a refresh
+FEED_CACHE_TTL = int(os.environ.get('FEED_CACHE_TTL', '600'))
+
+# Seconds after which a stale snapshot is no longer served and callers wait for a refresh
+FEED_CACHE_MAX_STALE = int(os.environ.get('FEED_CACHE_MAX_STALE', '86400'))
+
+# Optional JSON file used to persist snapshots across cold starts (e.g. /tmp/vigent-feeds.json)
+FEED_CACHE_PATH = os.environ.get('FEED_CACHE_PATH')
+
+
+class NotModified(Exception):
+    """Raised by a loader when the upstream answered 304 Not Modified."""
+
+
+class FeedCache:
+    def __init__(self, ttl=None, max_stale=None, path=None):
+        self.ttl = ttl or {}
+        self.default_ttl = FEED_CACHE_TTL
+        self.max_stale = max_stale or FEED_CACHE_MAX_STALE
+        self.path = path
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._source_locks = {}
+        self._write_lock = threading.Lock()
+        if self.path:
+            self._load_snapshot()
+
+    def get(self, source, loader):
+        """
+        Return the cached value for `source`, calling `loader(validators)` to
+        fill or refresh it. The loader returns `(value, validators)` or raises
+        NotModified. Exceptions from a blocking load propagate; exceptions
+        from a background refresh are logged and the old value is kept.
+        """
+        entry = self._entries.get(source)
+        if entry is not None:
+            age = time.time() - entry['fetched_at']
+            if age < self.ttl_for(source):
+                return entry['value']
+            if age < self.max_stale:
+                self._refresh_in_background(source, loader)
+                return entry['value']
+
+        # Nothing usable cached: load synchronously, one caller per source
+        with self._source_lock(source):
+            entry = self._entries.get(source)
+            if entry is not None and time.time() - entry['fetched_at'] < self.ttl_for(source):
+                return entry['value']
+            return self._load(source, loader)
+
+    def ttl_for(self, source):
+        return self.ttl.get(source, self.default_ttl)
+
+    def set(self, source, value, fetched_at=None, validators=None):
+        self._entries[source] = {
+            'value': value,
+            'fetched_at': fetched_at or time.time(),
+            'validators': validators or {}
+        }
+        if self.path:
+            self._save_snapshot()
+
+    def age(self, source):
+        entry = self._entries.get(source)
+        if entry is None:
+            return None
+        return time.time() - entry['fetched_at']
+
+    def _load(self, source, loader):
+        entry = self._entries.get(source)
+        try:
+            value, validators = loader(entry.get('validators', {}) if entry else {})
+        except NotModified:
+            if entry is None:
+                raise
+            # Upstream unchanged: keep the value, restart its TTL
+            self.set(source, entry['value'], validators=entry.get('validators'))
+            return entry['value']
+        self.set(source, value, validators=validators)
+        return value
+
+    def _refresh_in_background(self, source, loader):
+        with self._lock:
+            if source in self._refreshing:
+                return
+            self._refreshing.add(source)
+
+        def refresh():
+            try:
+                with self._source_lock(source):
+                    self._load(source, loader)
+            except Exception as e:
+                logger.error(f"Background refresh of {source} failed, serving stale data: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(source)
+
+        threading.Thread(target=refresh, name=f'feed-refresh-{source}', daemon=True).start()
+
+    def _source_lock(self, source):
+        with self._lock:
+            return self._source_locks.setdefault(source, threading.Lock())
+
+    def _load_snapshot(self):
+        try:
+            with open(self.path, 'r') as f:
+                self._entries = json.load(f)
+            logger.info(f"Loaded feed snapshot from {self.path}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable feed snapshot {self.path}: {str(e)}")
+
+    def _save_snapshot(self):
+        try:
+            with self._write_lock:
+                tmp_path = f'{self.path}.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump(dict(self._entries), f)
+                os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not write feed snapshot {self.path}: {str(e)}")
@@ -0,0 +1,406 @@
+"""
+Remote job board RSS feeds, normalized into the job dict shape used by the
+dashboard and cached per source.
+
+Boards are declared as JobSource entries in the SOURCES registry; adding a
+board is one register_source() call.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+from vigent import metrics
+from vigent.feed_cache import FeedCache, NotModified, FEED_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for each source before responding without it
+FEED_FETCH_TIMEOUT = float(os.environ.get('FEED_FETCH_TIMEOUT', '8'))
+
+# Parse feeds incrementally while they download (vigent.rss) instead of
+# downloading the whole document for feedparser
+FEED_STREAMING = os.environ.get('FEED_STREAMING', 'true').lower() == 'true'
+
+# Stop reading a feed after this many consecutive entries that are already
+# stored (0 reads up to max_entries); feeds list newest first, so the rest are
+# known too. More than one tolerates pinned or reordered posts.
+FEED_STOP_AFTER_KNOWN = int(os.environ.get('FEED_STOP_AFTER_KNOWN', '3'))
+
+# Sent with every feed request; some boards reject urllib's default agent
+FEED_USER_AGENT = os.environ.get('FEED_USER_AGENT', 'Mozilla/5.0 (compatible; vigent feed reader)')
+
+# Feed entry fields read by the normalization pipeline, by job field
+DEFAULT_FIELDS = {
+    'title': 'title',
+    'link': 'link',
+    'summary': 'summary',
+    'published': 'published',
+    'published_parsed': 'published_parsed',
+    # Free-text region some boards add to each entry (e.g. "Anywhere in the World")
+    'region': 'region'
+}
+
+
+class JobSource:
+    """
+    A job board RSS feed. Sources only declare where the feed lives and how
+    its entries map onto job fields; fetching, conditional requests, caching
+    and normalization are shared by all of them.
+
+    - name: key used in ?source= and in the feed cache
+    - label: value of each job's 'source' field
+    - url: RSS feed URL
+    - location: default location for jobs from this board
+    - fields: overrides for DEFAULT_FIELDS when the feed uses other entry keys
+    - id_salt: appended to the link when building job IDs (see job_id)
+    - max_entries: number of feed entries kept per fetch
+    - ttl: seconds a cached snapshot stays fresh (defaults to FEED_CACHE_TTL);
+      also the background refresher's starting poll interval
+    - min_interval / max_interval: bounds for the refresher's adaptive poll
+      interval (default FEED_POLL_MIN_INTERVAL / FEED_POLL_MAX_INTERVAL)
+    - streaming: parse incrementally (default FEED_STREAMING); set False for
+      feeds that aren't well-formed XML, which only feedparser tolerates
+    """
+
+    def __init__(self, name, label, url, location='Remote', fields=None,
+                 id_salt='', max_entries=15, ttl=None, min_interval=None, max_interval=None,
+                 streaming=None):
+        self.name = name
+        self.label = label
+        self.url = url
+        self.location = location
+        self.fields = dict(DEFAULT_FIELDS, **(fields or {}))
+        self.id_salt = id_salt
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.streaming = FEED_STREAMING if streaming is None else streaming
+
+    def fetch(self, validators=None, known=None):
+        """
+        Fetch and normalize this source's feed; returns `(jobs, validators)`.
+        Jobs are enriched (skills, job type, region) from the full entry text,
+        except those for which `known(job_id)` is true: ingestion passes the
+        store's lookup so each job is only enriched once.
+
+        Reading stops after max_entries jobs, or after FEED_STOP_AFTER_KNOWN
+        known jobs in a row; when streaming, the rest of the feed is never
+        downloaded.
+        """
+        logger.info(f"Fetching {self.label} RSS feed")
+        if self.streaming and _can_stream():
+            from vigent.rss import ParseError
+            try:
+                entries, new_validators = _stream_feed(self.url, validators, source=self.name)
+                return self._normalize(entries, known), new_validators
+            except ParseError as e:
+                logger.warning(f"{self.label} feed is not well-formed XML ({str(e)}), parsing it with feedparser")
+
+        feed = _parse_feed(self.url, validators, source=self.name)
+        return self._normalize(iter(feed.entries), known), _feed_validators(feed)
+
+    def _normalize(self, entries, known=None):
+        # The keyword automata are only built by processes that ingest
+        from vigent.enrich import enrich_job
+
+        jobs = []
+        known_run = 0
+        try:
+            for entry in entries:
+                try:
+                    job = normalize_entry(self, entry)
+                    if known and known(job['id']):
+                        known_run += 1
+                    else:
+                        known_run = 0
+                        enrich_job(job, entry_text(self, entry), entry.get(self.fields['region']),
+                                   default_location=self.location)
+                    jobs.append(job)
+                except Exception as e:
+                    logger.error(f"Error parsing {self.label} entry: {str(e)}")
+                    continue
+                if len(jobs) >= self.max_entries:
+                    break
+                if FEED_STOP_AFTER_KNOWN and known_run >= FEED_STOP_AFTER_KNOWN:
+                    logger.info(f"Stopped reading {self.label} feed at {known_run} already stored jobs")
+                    break
+        finally:
+            # Closes the connection of a streamed feed that was only partly read
+            close = getattr(entries, 'close', None)
+            if close:
+                close()
+        return jobs
+
+
+def job_id(link):
+    """Stable job ID: a content hash of the link, identical across processes and restarts."""
+    return hashlib.sha256(link.encode('utf-8')).hexdigest()[:16]
+
+
+def normalize_entry(source, entry):
+    """Build a dashboard job dict from one feed entry of `source`."""
+    fields = source.fields
+
+    pub_date = entry.get(fields['published'], 'N/A')
+    pub_date_obj = None
+    published_parsed = entry.get(fields['published_parsed'])
+    if published_parsed:
+        pub_date_obj = datetime(*published_parsed[:6])
+        pub_date_formatted = pub_date_obj.strftime('%B %d, %Y')
+    else:
+        pub_date_formatted = pub_date
+
+    summary = entry.get(fields['summary'], 'No description available')
+    if len(summary) > 250:
+        summary = summary[:250] + '...'
+
+    title = entry.get(fields['title'], 'No Title')
+    link = entry.get(fields['link'], '')
+    return {
+        'id': job_id(link + source.id_salt),
+        'title': title,
+        'link': link or '#',
+        'description': summary,
+        'summary': summary,
+        'published': pub_date_formatted,
+        'published_date': pub_date_obj.isoformat() if pub_date_obj else None,
+        'posted': pub_date_formatted,
+        'source': source.label,
+        'budget': 'See job posting',
+        # Filled in by enrich_job
+        'job_type': None,
+        'location': source.location,
+        'skills': []
+    }
+
+
+def entry_text(source, entry):
+    """Full text of a feed entry for enrichment: untruncated summary plus any category tags."""
+    tags = ' '.join(tag.get('term') or '' for tag in entry.get('tags') or [])
+    return f"{entry.get(source.fields['summary'], '')} {tags}"
+
+
+# Source name (as used in ?source=) -> JobSource
+SOURCES = {}
+
+feed_cache = FeedCache(path=FEED_CACHE_PATH)
+
+
+def register_source(source):
+    """Add a job board to the registry used by get_jobs."""
+    SOURCES[source.name] = source
+    if source.ttl:
+        feed_cache.ttl[source.name] = source.ttl
+    return source
+
+
+register_source(JobSource(
+    name='remotive',
+    label='Remotive',
+    url="https://remotive.com/api/remote-jobs/feed",
+    location='Remote'
+))
+
+register_source(JobSource(
+    name='wwremote',
+    label='We Work Remotely',
+    url="https://weworkremotely.com/remote-jobs.rss",
+    location='Anywhere',
+    id_salt='wwr'
+))
+
+
+def get_jobs(source='all', timeout=None, names=None):
+    """
+    Return `(jobs, sources)` for `source` (a registered source name, or all),
+    or for the source `names` given explicitly.
+
+    Sources are fetched concurrently through the feed cache and merged newest
+    first. A source that fails, or takes longer than `timeout` seconds, is
+    left out of the jobs; `sources` maps each requested source to its status
+    ('ok', 'error' or 'timeout'), job count, latency and error message. A
+    timed-out fetch keeps running and fills the cache for later requests.
+    """
+    timeout = timeout or FEED_FETCH_TIMEOUT
+    names = names or source_names(source)
+    if not names:
+        return [], {}
+
+    executor = ThreadPoolExecutor(max_workers=len(names))
+    try:
+        futures = {
+            name: executor.submit(metrics.in_context(_fetch_source), name)
+            for name in names
+        }
+        wait(futures.values(), timeout=timeout)
+    finally:
+        executor.shutdown(wait=False)
+
+    jobs = []
+    sources = {}
+    for name, future in futures.items():
+        if not future.done():
+            logger.warning(f"Timed out fetching {name} feed after {timeout}s")
+            sources[name] = {
+                'status': 'timeout',
+                'count': 0,
+                'latency_ms': round(timeout * 1000, 1),
+                'error': f'Timed out after {timeout}s'
+            }
+            continue
+        source_jobs, status = future.result()
+        jobs.extend(source_jobs)
+        sources[name] = status
+
+    # Sort by publish date (newest first)
+    jobs.sort(key=lambda x: x.get('published_date') or '', reverse=True)
+    return jobs, sources
+
+
+def source_names(source='all'):
+    """Registered source names selected by a ?source= value (a name, a label, or all)."""
+    return [
+        name for name, job_source in SOURCES.items()
+        if source in [name, job_source.label, 'all']
+    ]
+
+
+def _fetch_source(name):
+    started = time.perf_counter()
+    try:
+        jobs = feed_cache.get(name, SOURCES[name].fetch)
+        error = None
+    except Exception as e:
+        logger.error(f"Error fetching {name} feed: {str(e)}")
+        jobs = []
+        error = str(e)
+    return jobs, {
+        'status': 'error' if error else 'ok',
+        'count': len(jobs),
+        'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+        'error': error
+    }
+
+
+def _parse_feed(url, validators=None, source=None):
+    """
+    Fetch and parse a feed, sending the ETag / Last-Modified validators from
+    the previous fetch so an unchanged feed costs a 304 and no parsing.
+    Download and parse are timed separately in the feed metrics.
+    """
+    # Loaded on first fetch: request handlers that only read the store never need it
+    import feedparser
+
+    source = source or url
+    body, headers = _download(url, validators or {}, source)
+
+    started = time.perf_counter()
+    feed = feedparser.parse(body, response_headers=headers)
+    metrics.feed_parse_duration.observe(time.perf_counter() - started, source=source)
+    metrics.feed_entries.observe(len(feed.entries), source=source)
+
+    # Don't replace a good cached snapshot with an empty result from a failed fetch
+    if feed.get('bozo') and not feed.entries:
+        raise feed.get('bozo_exception') or ValueError(f"Could not parse feed {url}")
+    feed['etag'] = headers.get('etag')
+    feed['modified'] = headers.get('last-modified')
+    return feed
+
+
+def _can_stream():
+    """Whether vigent.rss can be used; feedparser parses the feed otherwise."""
+    from vigent.rss import AVAILABLE
+    return AVAILABLE
+
+
+def _stream_feed(url, validators=None, source=None):
+    """
+    Open a feed for incremental parsing; returns `(entries, validators)`.
+    `entries` is a generator of feedparser-style entry dicts that downloads
+    and parses the feed as it is iterated, and closes the connection when it
+    is exhausted or closed early. Raises NotModified on a 304.
+    """
+    from vigent.rss import FeedStats, iter_entries
+
+    source = source or url
+    started = time.perf_counter()
+    response = _open(url, validators or {}, source)
+    headers = _headers(response)
+    opened = time.perf_counter() - started
+
+    def entries():
+        stats = FeedStats()
+        try:
+            yield from iter_entries(response, stats, gzipped=headers.get('content-encoding') == 'gzip')
+        finally:
+            response.close()
+            _observe_fetch(source, response.status, opened + stats.read_seconds, stats.bytes)
+            metrics.feed_parse_duration.observe(stats.parse_seconds, source=source)
+            metrics.feed_entries.observe(stats.entries, source=source)
+
+    return entries(), {
+        'etag': headers.get('etag'),
+        'modified': headers.get('last-modified')
+    }
+
+
+def _download(url, validators, source):
+    """GET a whole feed; returns `(body, headers)`, or raises NotModified on a 304."""
+    started = time.perf_counter()
+    with _open(url, validators, source) as response:
+        body = response.read()
+        headers = _headers(response)
+        _observe_fetch(source, response.status, time.perf_counter() - started, len(body))
+
+    if headers.get('content-encoding') == 'gzip':
+        body = gzip.decompress(body)
+    return body, headers
+
+
+def _open(url, validators, source):
+    """Send a conditional GET for a feed and return the open response."""
+    request = urllib.request.Request(url, headers={
+        'User-Agent': FEED_USER_AGENT,
+        'Accept-Encoding': 'gzip'
+    })
+    if validators.get('etag'):
+        request.add_header('If-None-Match', validators['etag'])
+    if validators.get('modified'):
+        request.add_header('If-Modified-Since', validators['modified'])
+
+    started = time.perf_counter()
+    try:
+        return urllib.request.urlopen(request, timeout=FEED_FETCH_TIMEOUT)
+    except urllib.error.HTTPError as e:
+        _observe_fetch(source, e.code, time.perf_counter() - started)
+        if e.code == 304:
+            logger.info(f"Feed not modified: {url}")
+            raise NotModified(url)
+        raise
+    except Exception:
+        _observe_fetch(source, 'error', time.perf_counter() - started)
+        raise
+
+
+def _headers(response):
+    return {name.lower(): value for name, value in response.headers.items()}
+
+
+def _observe_fetch(source, status, seconds, size=0):
+    metrics.feed_fetch_duration.observe(seconds, source=source, status=status)
+    metrics.feed_response_bytes.observe(size, source=source)
+    metrics.record_span('feeds', seconds)
+
+
+def _feed_validators(feed):
+    return {
+        'etag': feed.get('etag'),
+        'modified': feed.get('modified')
+    }
@@ -0,0 +1,461 @@
+"""
+Shared Gemini client layer.
+
+All Gemini traffic goes through one GeminiModel per model name, so model
+configuration, the API key, and limits live in one place:
+
+- at most GEMINI_MAX_CONCURRENCY calls in flight per process
+- a process-wide token bucket sized to the quota (GEMINI_RPM, GEMINI_BURST);
+  callers queue for up to GEMINI_QUEUE_TIMEOUT seconds instead of getting 429s
+- retries with jittered exponential backoff on 429 and 5xx errors
+- optional hedged requests (GEMINI_HEDGE_AFTER): if a call hasn't answered
+  after that many seconds a duplicate is sent and the first reply wins, as
+  long as a hedge, a concurrency slot and a rate limiter token are free
+  (at most GEMINI_HEDGE_MAX hedges in flight)
+- context caching (GeminiModel.with_cached_prefix): a long prompt prefix,
+  such as a resume, is stored once with Gemini's cached-content API in the
+  background, and calls made after that only send the part after it
+"""
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from vigent import metrics
+from vigent.generation import GenerationError
+
+logger = logging.getLogger(__name__)
+
+GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+
+# Model used by every endpoint
+GEMINI_MODEL = os.environ.get('GEMINI_MODEL', 'gemini-2.5-flash')
+
+# Max Gemini calls in flight across the whole process
+GEMINI_MAX_CONCURRENCY = int(os.environ.get('GEMINI_MAX_CONCURRENCY', '8'))
+
+# Requests per minute allowed by our quota, and how many may be sent in a burst
+# (at least 1 of each: the token bucket can't refill at a rate of zero)
+GEMINI_RPM = max(1.0, float(os.environ.get('GEMINI_RPM', '60')))
+GEMINI_BURST = max(1, int(os.environ.get('GEMINI_BURST', '10')))
+
+# Seconds a call may wait for the rate limiter before failing with 429
+GEMINI_QUEUE_TIMEOUT = float(os.environ.get('GEMINI_QUEUE_TIMEOUT', '30'))
+
+# Retries after the first attempt, and the backoff base/cap in seconds
+GEMINI_MAX_RETRIES = int(os.environ.get('GEMINI_MAX_RETRIES', '3'))
+GEMINI_BACKOFF_BASE = float(os.environ.get('GEMINI_BACKOFF_BASE', '0.5'))
+GEMINI_BACKOFF_MAX = float(os.environ.get('GEMINI_BACKOFF_MAX', '8'))
+
+# Seconds before a hedged duplicate request is sent (0 disables hedging)
+GEMINI_HEDGE_AFTER = float(os.environ.get('GEMINI_HEDGE_AFTER', '0'))
+
+# Max hedged duplicates in flight across the process; hedges beyond it are skipped
+GEMINI_HEDGE_MAX = int(os.environ.get('GEMINI_HEDGE_MAX', '2'))
+
+# Cache long prompt prefixes with Gemini's cached-content API (true/false)
+GEMINI_CONTEXT_CACHE = os.environ.get('GEMINI_CONTEXT_CACHE', 'true').lower() == 'true'
+
+# Seconds a cached prefix lives on Gemini's side before it has to be recreated
+GEMINI_CONTEXT_CACHE_TTL = int(os.environ.get('GEMINI_CONTEXT_CACHE_TTL', '3600'))
+
+# Prefixes shorter than this are sent inline: Gemini rejects cached contents
+# under its minimum token count (about 4 characters per token)
+GEMINI_CONTEXT_CACHE_MIN_CHARS = int(os.environ.get('GEMINI_CONTEXT_CACHE_MIN_CHARS', '4096'))
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def acquire(self, timeout=None):
+        """Take a token, waiting up to `timeout` seconds; returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait_time = (1 - self.tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_time = min(wait_time, remaining)
+            time.sleep(wait_time)
+
+    def refund(self):
+        """Return a token taken for a call that was never sent."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+rate_limiter = TokenBucket(GEMINI_RPM / 60, GEMINI_BURST)
+concurrency_slots = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+# First attempts of hedged calls run here so the caller can time them out;
+# duplicates get their own small pool and never queue behind first attempts
+_attempt_pool = ThreadPoolExecutor(max_workers=GEMINI_MAX_CONCURRENCY, thread_name_prefix='gemini-attempt')
+_hedge_pool = ThreadPoolExecutor(max_workers=max(1, GEMINI_HEDGE_MAX), thread_name_prefix='gemini-hedge')
+hedge_slots = threading.BoundedSemaphore(max(1, GEMINI_HEDGE_MAX))
+
+
+class GeminiModel:
+    """
+    Drop-in wrapper around genai.GenerativeModel.generate_content that applies
+    the process-wide limits, retries and hedging. Streamed calls hold their
+    concurrency slot until the stream has been consumed, and are only retried
+    if they fail before the first chunk.
+    """
+
+    def __init__(self, model, hedge_after=None):
+        self.model = model
+        self.model_name = getattr(model, 'model_name', type(model).__name__)
+        self.hedge_after = GEMINI_HEDGE_AFTER if hedge_after is None else hedge_after
+
+    def generate_content(self, *args, deadline=None, **kwargs):
+        """
+        genai's generate_content, rate limited and retried. `deadline` (a
+        time.monotonic() value) bounds how long a hedged call waits for its
+        attempts; past it a GenerationError (504) is raised.
+        """
+        if kwargs.get('stream'):
+            # The generator body runs later, so take the call label now
+            return self._stream(metrics.current_gemini_call(), *args, **kwargs)
+        return self._with_retries(lambda: self._call(deadline, *args, **kwargs))
+
+    def with_cached_prefix(self, key, system_instruction, prefix):
+        """
+        A GeminiModel whose calls implicitly start with `system_instruction`
+        and `prefix`, stored once per `key` in Gemini's context cache, or None
+        if the prefix isn't cached yet or can't be (too short, disabled, or
+        the API refused); the caller then sends the prefix inline.
+        """
+        return context_cache.model_for(self, key, system_instruction, prefix)
+
+    def _call(self, deadline, *args, **kwargs):
+        if not self.hedge_after:
+            return self._attempt(*args, **kwargs)
+
+        # Set once the caller has given up, so attempts not yet sent are dropped
+        abandoned = threading.Event()
+        first = _attempt_pool.submit(metrics.in_context(self._attempt), *args, _abandoned=abandoned, **kwargs)
+        hedge_after = self.hedge_after
+        if deadline is not None:
+            hedge_after = min(hedge_after, _remaining(deadline))
+        done, _ = wait([first], timeout=hedge_after)
+        second = None if done else self._hedge(abandoned, *args, **kwargs)
+        pending = {first} if second is None else {first, second}
+        while pending:
+            done, pending = wait(pending, timeout=_remaining(deadline), return_when=FIRST_COMPLETED)
+            if not done:
+                abandoned.set()
+                first.cancel()
+                if second is not None and second.cancel():
+                    # The hedge never ran, so its reserved slots are still held
+                    concurrency_slots.release()
+                    hedge_slots.release()
+                    rate_limiter.refund()
+                raise GenerationError('Timed out waiting for Gemini', 504)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+        # Both failed: surface the original error
+        return first.result()
+
+    def _hedge(self, abandoned, *args, **kwargs):
+        """
+        Send a duplicate of a slow call, or return None when there is no spare
+        capacity right now: hedging a saturated process or quota only adds load.
+        """
+        if not hedge_slots.acquire(blocking=False):
+            return None
+        if not concurrency_slots.acquire(blocking=False):
+            hedge_slots.release()
+            return None
+        if not rate_limiter.try_acquire():
+            concurrency_slots.release()
+            hedge_slots.release()
+            return None
+        logger.info(f"Hedging {self.model_name} call after {self.hedge_after}s")
+
+        def run():
+            try:
+                return self._attempt(*args, _reserved=True, _abandoned=abandoned, **kwargs)
+            finally:
+                hedge_slots.release()
+        return _hedge_pool.submit(metrics.in_context(run))
+
+    def _attempt(self, *args, _reserved=False, _abandoned=None, **kwargs):
+        """
+        One call; `_reserved` means a rate limiter token and concurrency slot
+        were already taken. If `_abandoned` is set by the time the call could
+        be sent, the token is refunded and nothing is sent.
+        """
+        if not _reserved:
+            if _abandoned is not None and _abandoned.is_set():
+                raise GenerationError('Timed out waiting for Gemini', 504)
+            _take_token()
+            concurrency_slots.acquire()
+        try:
+            if _abandoned is not None and _abandoned.is_set():
+                rate_limiter.refund()
+                raise GenerationError('Timed out waiting for Gemini', 504)
+            started = time.perf_counter()
+            try:
+                response = self.model.generate_content(*args, **kwargs)
+            except Exception:
+                _observe_call(started, 'error')
+                raise
+            _observe_call(started, 'ok', response)
+            return response
+        finally:
+            concurrency_slots.release()
+
+    def _stream(self, call, *args, **kwargs):
+        started = None
+
+        def open_stream():
+            nonlocal started
+            _take_token()
+            slot = concurrency_slots
+            slot.acquire()
+            started = time.perf_counter()
+            try:
+                chunks = iter(self.model.generate_content(*args, **kwargs))
+                first = next(chunks, None)
+            except BaseException:
+                slot.release()
+                _observe_call(started, 'error', call=call)
+                raise
+            return slot, first, chunks
+
+        slot, first, chunks = self._with_retries(open_stream)
+        last = first
+        outcome = 'error'
+        try:
+            if first is not None:
+                yield first
+            for chunk in chunks:
+                last = chunk
+                yield chunk
+            outcome = 'ok'
+        finally:
+            slot.release()
+            # Usage metadata arrives with the final chunk
+            _observe_call(started, outcome, last, call=call)
+
+    def _with_retries(self, call):
+        attempt = 0
+        while True:
+            try:
+                return call()
+            except GenerationError:
+                raise
+            except Exception as e:
+                status = error_status(e)
+                if status not in RETRYABLE_STATUS:
+                    raise
+                if attempt >= GEMINI_MAX_RETRIES:
+                    logger.error(f"Gemini call failed after {attempt + 1} attempts: {str(e)}")
+                    raise GenerationError(f'Gemini API unavailable, please try again shortly ({status})',
+                                          429 if status == 429 else 503)
+                metrics.gemini_retries.inc(status=status)
+                # Full jitter keeps retrying workers from synchronizing
+                delay = random.uniform(0, min(GEMINI_BACKOFF_MAX, GEMINI_BACKOFF_BASE * 2 ** attempt))
+                logger.warning(f"Gemini call failed with {status}, retrying in {delay:.2f}s: {str(e)}")
+                time.sleep(delay)
+                attempt += 1
+
+
+class ContextCache:
+    """
+    Cached-content handles by (model, key), each valid until its expiry.
+
+    Handles are created on a background thread, so no request waits for the
+    create call: until a handle is ready callers get None and send the
+    prefix inline. Prefixes Gemini refuses to cache (e.g. too small) are
+    remembered for one TTL and sent inline without retrying; transient
+    failures (429s, 5xx, rate limiter timeouts) are not remembered, so the
+    next request for the prefix tries again.
+    """
+
+    # Seconds before expiry at which a handle is no longer handed out
+    EXPIRY_MARGIN = 60
+
+    def __init__(self, ttl=GEMINI_CONTEXT_CACHE_TTL, min_chars=GEMINI_CONTEXT_CACHE_MIN_CHARS,
+                 enabled=GEMINI_CONTEXT_CACHE):
+        self.ttl = ttl
+        self.min_chars = min_chars
+        self.enabled = enabled
+        # (model name, key) -> (GeminiModel or None, expires_at)
+        self._handles = {}
+        # (model name, key) of create calls in flight
+        self._creating = set()
+        self._lock = threading.Lock()
+
+    def model_for(self, base, key, system_instruction, prefix):
+        if not self.enabled or len(prefix) < self.min_chars:
+            return None
+        handle_key = (base.model_name, key)
+        model = self._valid(handle_key)
+        if model is not False:
+            return model
+
+        # One create call per prefix at a time
+        with self._lock:
+            if handle_key in self._creating:
+                return None
+            self._creating.add(handle_key)
+        threading.Thread(
+            target=self._create_in_background,
+            args=(base, key, handle_key, system_instruction, prefix),
+            name='gemini-context-cache',
+            daemon=True
+        ).start()
+        return None
+
+    def _create_in_background(self, base, key, handle_key, system_instruction, prefix):
+        try:
+            model = self._create(base, key, system_instruction, prefix)
+        except Exception as e:
+            logger.warning(f"Context caching failed for {key[:16]}, will retry on a later request: {str(e)}")
+            return
+        finally:
+            with self._lock:
+                self._creating.discard(handle_key)
+        with self._lock:
+            self._evict_expired()
+            self._handles[handle_key] = (model, time.time() + self.ttl)
+
+    def _valid(self, handle_key):
+        """The live handle for `handle_key` (None if known uncacheable), or False."""
+        with self._lock:
+            entry = self._handles.get(handle_key)
+        if entry and entry[1] - self.EXPIRY_MARGIN > time.time():
+            return entry[0]
+        return False
+
+    def _create(self, base, key, system_instruction, prefix):
+        """
+        Create the cached content for `prefix`. Returns None if Gemini refuses
+        it for good (4xx other than 429); raises on transient failures.
+        """
+        import google.generativeai as genai
+        _take_token()
+        try:
+            cached_content = genai.caching.CachedContent.create(
+                model=base.model_name,
+                display_name=f'vigent-{key[:16]}',
+                system_instruction=system_instruction,
+                contents=[prefix],
+                ttl=timedelta(seconds=self.ttl)
+            )
+        except Exception as e:
+            status = error_status(e)
+            if status is None or status in RETRYABLE_STATUS:
+                raise
+            logger.warning(f"Context caching unavailable for {key[:16]}, sending prefix inline: {str(e)}")
+            return None
+        logger.info(f"Cached {len(prefix)} character prompt prefix for {key[:16]} as {cached_content.name}")
+        return GeminiModel(genai.GenerativeModel.from_cached_content(cached_content=cached_content),
+                           hedge_after=base.hedge_after)
+
+    def _evict_expired(self):
+        now = time.time()
+        for handle_key, (_, expires_at) in list(self._handles.items()):
+            if expires_at <= now:
+                del self._handles[handle_key]
+
+
+context_cache = ContextCache()
+
+
+def error_status(error):
+    """HTTP status of a Gemini SDK error (google.api_core exceptions carry .code), if any."""
+    code = getattr(error, 'code', None)
+    if isinstance(code, int):
+        return code
+    status = getattr(error, 'status_code', None)
+    return status if isinstance(status, int) else None
+
+
+_models = {}
+_models_lock = threading.Lock()
+_configured = False
+
+
+def get_model(name=None):
+    """The shared, rate-limited GeminiModel for `name` (default GEMINI_MODEL)."""
+    global _configured
+    name = name or GEMINI_MODEL
+    with _models_lock:
+        if name not in _models:
+            import google.generativeai as genai
+            if not _configured and GEMINI_API_KEY:
+                genai.configure(api_key=GEMINI_API_KEY)
+                _configured = True
+            _models[name] = GeminiModel(genai.GenerativeModel(name))
+        return _models[name]
+
+
+def _observe_call(started, outcome, response=None, call=None):
+    """Record one Gemini call's latency and token usage in the metrics."""
+    call = call or metrics.current_gemini_call()
+    duration = time.perf_counter() - started
+    metrics.gemini_call_duration.observe(duration, call=call, outcome=outcome)
+    metrics.record_span('gemini', duration)
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+    if prompt_tokens:
+        metrics.gemini_prompt_tokens.observe(prompt_tokens, call=call)
+    response_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+    if response_tokens:
+        metrics.gemini_response_tokens.observe(response_tokens, call=call)
+    cached_tokens = getattr(usage, 'cached_content_token_count', 0) or 0
+    if cached_tokens:
+        metrics.gemini_cached_tokens.inc(cached_tokens, call=call)
+
+
+def _take_token():
+    started = time.perf_counter()
+    acquired = rate_limiter.acquire(timeout=GEMINI_QUEUE_TIMEOUT)
+    waited = time.perf_counter() - started
+    metrics.gemini_rate_limit_wait.observe(waited)
+    metrics.record_span('gemini_queue', waited)
+    if not acquired:
+        raise GenerationError('Too many requests to Gemini right now, please try again shortly', 429)
+
+
+def _remaining(deadline):
+    """Seconds until a time.monotonic() deadline, or None without one."""
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
@@ -0,0 +1,690 @@
+"""
+Proposal and application package generation: prompts, question parsing and
+the concurrent Gemini fan-out used by /api/generate-application.
+"""
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, TimeoutError, as_completed, wait
+
+from vigent import metrics
+from vigent.generation_cache import generation_cache, generation_key, question_cache
+from vigent.resume import prepare_resume, resume_context
+
+logger = logging.getLogger(__name__)
+
+# Max Gemini calls in flight for a single request (1 = sequential)
+GENERATION_CONCURRENCY = int(os.environ.get('GENERATION_CONCURRENCY', '4'))
+
+# Seconds allowed for a whole application package before giving up
+GENERATION_DEADLINE = float(os.environ.get('GENERATION_DEADLINE', '25'))
+
+# Answer all questions in one structured call instead of one call per question
+GENERATION_BATCH_ANSWERS = os.environ.get('GENERATION_BATCH_ANSWERS', 'true').lower() == 'true'
+
+# Bump whenever a prompt below changes so cached generations are not reused
+PROMPT_VERSION = 3
+
+MAX_QUESTIONS = 5
+
+# System instruction cached with the resume prefix
+RESUME_SYSTEM_INSTRUCTION = (
+    "You help a job candidate apply for jobs: cover letters and interview answers. "
+    "Base everything on the candidate's resume, which is provided first, and never invent experience."
+)
+
+FALLBACK_QUESTIONS = [
+    "Tell me about your relevant experience for this role.",
+    "What interests you about this position?",
+    "Describe a challenging project you've worked on.",
+    "What are your salary expectations?",
+    "Where do you see yourself in 3 years?"
+]
+
+FALLBACK_ANSWER = "Based on my experience outlined in my resume, I have the relevant skills and background for this aspect of the role."
+
+
+class GenerationError(Exception):
+    """Raised when a package cannot be generated; carries the HTTP status to return."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def proposal_prompt(job_title, job_description, job_budget):
+    return f"""You are an expert freelance proposal writer. Write a compelling, professional Upwork proposal for the following job.
+
+Job Title: {job_title}
+
+Job Description: {job_description}
+
+Budget: {job_budget}
+
+Write a personalized proposal that:
+1. Directly addresses the client's needs
+2. Highlights relevant experience and skills
+3. Explains your approach to the project
+4. Shows enthusiasm and professionalism
+5. Includes a brief call-to-action
+6. Is concise (200-300 words)
+
+Do not include placeholder text like [Your Name] or generic statements. Write as if you are a skilled freelancer with relevant experience."""
+
+
+def cover_letter_prompt(job_title, job_description, resume=None):
+    return f"""{_resume_block(resume)}You are an expert career coach. Write a compelling, professional cover letter for this job application.
+
+Job Title: {job_title}
+
+Job Description: {job_description}
+
+Write a personalized cover letter that:
+1. Directly addresses the job requirements
+2. Highlights relevant experience from the resume
+3. Shows genuine interest in the role
+4. Is professional yet personable
+5. Is concise (250-350 words)
+
+Write the cover letter in first person, ready to copy and paste. Do not include placeholders like [Date] or [Company Name]."""
+
+
+def questions_prompt(job_title, job_description):
+    return f"""You are an expert interviewer. Based on this job description, generate 5 common interview questions that would likely be asked.
+
+Job Title: {job_title}
+
+Job Description: {job_description}
+
+Generate 5 realistic interview questions that:
+1. Focus on key skills and requirements from the job description
+2. Are commonly asked in real interviews
+3. Are specific to this role
+4. Range from technical to behavioral
+
+Return ONLY a JSON array of questions, like this:
+["Question 1", "Question 2", "Question 3", "Question 4", "Question 5"]"""
+
+
+def answer_prompt(question, resume=None):
+    return f"""{_resume_block(resume)}You are helping a job candidate prepare for an interview. Based on their resume, generate a strong, concise answer to this interview question.
+
+Interview Question: {question}
+
+Generate a professional, concise answer (2-3 sentences) that:
+1. Directly answers the question
+2. References specific experience from the resume when relevant
+3. Is confident and professional
+4. Uses first person ("I have...")
+
+Return ONLY the answer text, no introduction or explanation."""
+
+
+def answers_prompt(questions, resume=None):
+    questions_json = json.dumps(questions, indent=2)
+    return f"""{_resume_block(resume)}You are helping a job candidate prepare for an interview. Based on their resume, generate a strong, concise answer to each of these interview questions.
+
+Interview Questions:
+{questions_json}
+
+For each question, generate a professional, concise answer (2-3 sentences) that:
+1. Directly answers the question
+2. References specific experience from the resume when relevant
+3. Is confident and professional
+4. Uses first person ("I have...")
+
+Return ONLY a JSON object mapping each question, copied exactly, to its answer text, like this:
+{{"Question 1": "Answer 1", "Question 2": "Answer 2"}}"""
+
+
+def resume_prefix(profile):
+    """The stable prompt prefix cached per resume: the full prepared resume."""
+    return _resume_block(resume_context(profile, 'cover_letter'))
+
+
+class ResumeSession:
+    """
+    The model and resume text for the resume-bearing prompts of one package.
+
+    Resume prompts start with the same resume block, so when the model
+    supports context caching (see GeminiModel.with_cached_prefix) that block
+    and RESUME_SYSTEM_INSTRUCTION are cached once per resume hash and the
+    prompts are sent without it. Otherwise, including while the cache is
+    still being created, each prompt carries only the resume sections it needs.
+    """
+
+    def __init__(self, model, resume):
+        self.profile = prepare_resume(resume)
+        self.model = model
+        self.cached = False
+        with_cached_prefix = getattr(model, 'with_cached_prefix', None)
+        if with_cached_prefix:
+            cached_model = with_cached_prefix(self.profile['hash'], RESUME_SYSTEM_INSTRUCTION,
+                                              resume_prefix(self.profile))
+            if cached_model is not None:
+                self.model = cached_model
+                self.cached = True
+
+    def context(self, purpose, question=None):
+        """Resume text for a prompt, or None when it is already in the cached prefix."""
+        if self.cached:
+            return None
+        return resume_context(self.profile, purpose, question)
+
+
+def response_text(response):
+    """Return the text of a Gemini response, or None if it is empty or blocked."""
+    if not response or not hasattr(response, 'text') or not response.text:
+        return None
+    return response.text
+
+
+def strip_code_fences(text):
+    """Remove markdown code fences if present (```json ... ``` or ``` ... ```)."""
+    text = text.strip()
+    if text.startswith('```'):
+        # Find the first newline after opening fence
+        first_newline = text.find('\n')
+        if first_newline != -1:
+            text = text[first_newline + 1:]
+        # Remove closing fence
+        if text.endswith('```'):
+            text = text[:-3]
+        text = text.strip()
+    return text
+
+
+def parse_questions(text):
+    """
+    Parse interview questions from a model response with robust handling of
+    markdown fences. Falls back to FALLBACK_QUESTIONS if fewer than 3 usable
+    questions come back.
+    """
+    try:
+        questions_text = strip_code_fences(text)
+
+        # Try to parse as JSON array
+        if questions_text.startswith('[') and questions_text.endswith(']'):
+            parsed_questions = json.loads(questions_text)
+            # Validate that all entries are non-empty strings
+            questions_list = [
+                q.strip() for q in parsed_questions
+                if isinstance(q, str) and len(q.strip()) > 10
+            ]
+        else:
+            # Fallback: parse line-by-line and filter garbage
+            lines = [line.strip('- 0123456789."\'') for line in questions_text.split('\n')]
+            questions_list = [
+                q for q in lines
+                if q and len(q) > 10 and not q.lower().startswith('json')
+            ]
+
+        # If we still don't have good questions, use fallback
+        if not questions_list or len(questions_list) < 3:
+            raise ValueError("Insufficient valid questions parsed")
+
+        return questions_list
+
+    except Exception as e:
+        logger.warning(f"Question parsing failed: {str(e)}, using fallback questions")
+        return list(FALLBACK_QUESTIONS)
+
+
+def parse_answers(text, questions):
+    """
+    Parse a batched answers response into {question: answer}. Keys are matched
+    exactly, then case/whitespace-insensitively, then by 1-based position.
+    Questions without a usable answer are left out so the caller can retry them.
+    """
+    try:
+        answers_text = strip_code_fences(text)
+        if not (answers_text.startswith('{') and answers_text.endswith('}')):
+            raise ValueError("Response is not a JSON object")
+        parsed_answers = json.loads(answers_text)
+    except Exception as e:
+        logger.warning(f"Answer parsing failed: {str(e)}, falling back to per-question answers")
+        return {}
+
+    normalized = {
+        ' '.join(str(key).split()).lower(): value
+        for key, value in parsed_answers.items()
+    }
+    answers = {}
+    for index, question in enumerate(questions):
+        answer = parsed_answers.get(question)
+        if answer is None:
+            answer = normalized.get(' '.join(question.split()).lower())
+        if answer is None:
+            answer = parsed_answers.get(str(index + 1))
+        if isinstance(answer, str) and answer.strip():
+            answers[question] = answer.strip()
+    return answers
+
+
+def generate_application_package(model, job_title, job_description, resume,
+                                 concurrency=None, deadline=None, batch_answers=None):
+    """
+    Generate the cover letter, interview questions and answers for one job.
+
+    The cover letter and the questions prompt run in parallel, and the answer
+    prompts are fanned out as soon as the questions are parsed, so end-to-end
+    latency is roughly two or three Gemini round-trips instead of seven.
+    At most `concurrency` calls are in flight at once (1 gives the original
+    sequential behaviour). If `deadline` seconds pass before the cover letter
+    or questions are ready a GenerationError (504) is raised; answers still
+    pending at the deadline get the fallback answer.
+
+    With `batch_answers` all questions are answered by a single prompt that
+    carries the resume once, and only answers missing from that response are
+    requested individually.
+
+    The resume is preprocessed once (see vigent.resume) and shared by the
+    resume prompts through a ResumeSession. Questions come from the question
+    cache when another candidate (or ingestion) already generated them for
+    this job, in which case the answers start right away.
+
+    Returns a dict with 'cover_letter', 'questions' (list of question/answer
+    pairs) and 'complete' (False if any fallback question or answer was used).
+    """
+    # The deadline covers resume preparation too
+    deadline = deadline or GENERATION_DEADLINE
+    expires_at = time.monotonic() + deadline
+    session = ResumeSession(model, resume)
+    concurrency = max(1, concurrency or GENERATION_CONCURRENCY)
+    if batch_answers is None:
+        batch_answers = GENERATION_BATCH_ANSWERS
+
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        cover_future = submit_call(
+            executor, 'cover_letter', session.model.generate_content,
+            cover_letter_prompt(job_title, job_description, session.context('cover_letter')),
+            deadline=expires_at)
+        questions_list = cached_questions(model, job_title, job_description)
+        if questions_list is None:
+            questions_future = executor.submit(
+                metrics.in_context(generate_questions), model, job_title, job_description)
+            done, _ = wait([questions_future], timeout=remaining(expires_at))
+            if not done:
+                raise GenerationError('Timed out generating interview questions', 504)
+            questions_list = questions_future.result()
+
+        answer_futures = {}
+        if batch_answers:
+            batch_future = submit_call(
+                executor, 'answers', session.model.generate_content,
+                answers_prompt(questions_list, session.context('answers')), deadline=expires_at)
+        else:
+            answer_futures = _submit_answers(executor, session, questions_list, expires_at)
+
+        done, _ = wait([cover_future], timeout=remaining(expires_at))
+        if not done:
+            raise GenerationError('Timed out generating cover letter', 504)
+        cover_letter = response_text(cover_future.result())
+        if not cover_letter:
+            raise GenerationError('Failed to generate cover letter')
+
+        answers = {}
+        if batch_answers:
+            answers = _batch_answers(batch_future, questions_list, expires_at)
+            # Only retry the questions the batched call missed
+            missing = [q for q in questions_list if q not in answers]
+            if missing and remaining(expires_at) > 0:
+                answer_futures = _submit_answers(executor, session, missing, expires_at)
+
+        answers.update(_collect_answers(answer_futures, expires_at))
+        return application_package(cover_letter, questions_list, answers)
+    finally:
+        # Don't block the response on calls that missed the deadline
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def questions_cache_key(model, job_title, job_description):
+    return generation_key('questions', _model_name(model), PROMPT_VERSION, job_title, job_description)
+
+
+def cached_questions(model, job_title, job_description):
+    """The job's parsed interview questions from the question cache, or None."""
+    return question_cache.get(questions_cache_key(model, job_title, job_description))
+
+
+def remember_questions(model, job_title, job_description, questions_list):
+    """Cache a job's parsed questions, unless parsing fell back to FALLBACK_QUESTIONS."""
+    if questions_list != FALLBACK_QUESTIONS[:MAX_QUESTIONS]:
+        question_cache.set(questions_cache_key(model, job_title, job_description), questions_list)
+
+
+def generate_questions(model, job_title, job_description):
+    """
+    The parsed interview questions for a job, through the question cache: the
+    questions prompt only depends on the job, so every candidate applying to
+    it shares one Gemini call. Raises GenerationError on an empty response.
+    """
+    questions_list = cached_questions(model, job_title, job_description)
+    if questions_list is not None:
+        return questions_list
+
+    with metrics.gemini_call('questions'):
+        questions_text = response_text(model.generate_content(questions_prompt(job_title, job_description)))
+    if not questions_text:
+        raise GenerationError('Failed to generate interview questions')
+    questions_list = parse_questions(questions_text)[:MAX_QUESTIONS]
+    remember_questions(model, job_title, job_description, questions_list)
+    return questions_list
+
+
+def precompute_questions(model, jobs, concurrency=None):
+    """
+    Generate and cache the interview questions of stored `jobs` that don't
+    have them yet, so their first application skips that call. Returns the
+    number of question sets generated.
+    """
+    pending = [
+        job for job in jobs
+        if cached_questions(model, job.get('title', ''), job.get('description', '')) is None
+    ]
+    if not pending:
+        return 0
+
+    generated = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency or GENERATION_CONCURRENCY)) as executor:
+        futures = [
+            executor.submit(generate_questions, model, job.get('title', ''), job.get('description', ''))
+            for job in pending
+        ]
+        for job, future in zip(pending, futures):
+            try:
+                future.result()
+                generated += 1
+            except Exception as e:
+                logger.error(f"Error precomputing questions for job {job.get('id')}: {str(e)}")
+    return generated
+
+
+def application_cache_key(model, job_title, job_description, resume):
+    return generation_key('application', _model_name(model), PROMPT_VERSION,
+                          job_title, job_description, resume)
+
+
+def proposal_cache_key(model, job_title, job_description, job_budget):
+    return generation_key('proposal', _model_name(model), PROMPT_VERSION,
+                          job_title, job_description, job_budget)
+
+
+def cached_application_package(model, job_title, job_description, resume,
+                               regenerate=False, **options):
+    """
+    generate_application_package through the generation cache. Returns
+    `(package, cached)`; `regenerate` skips the lookup and replaces the entry.
+    Packages that needed fallback content are not cached.
+    """
+    key = application_cache_key(model, job_title, job_description, resume)
+    if not regenerate:
+        package = generation_cache.get(key)
+        if package is not None:
+            return package, True
+
+    package = generate_application_package(model, job_title, job_description, resume, **options)
+    return remember_package(key, package), False
+
+
+def application_package(cover_letter, questions_list, answers):
+    """
+    The package dict for a cover letter, questions and {question: answer}:
+    questions without an answer get FALLBACK_ANSWER, and 'complete' is False
+    if any fallback question or answer was used.
+    """
+    return {
+        'cover_letter': cover_letter,
+        'questions': [
+            {'question': question, 'answer': answers.get(question) or FALLBACK_ANSWER}
+            for question in questions_list
+        ],
+        'complete': (
+            questions_list != FALLBACK_QUESTIONS[:MAX_QUESTIONS]
+            and all(answers.get(question) for question in questions_list)
+        )
+    }
+
+
+def remember_package(key, package):
+    """Store a package under its application_cache_key if it is complete; returns it."""
+    if package['complete']:
+        generation_cache.set(key, package)
+    return package
+
+
+def stream_proposal_events(model, job_title, job_description, job_budget, regenerate=False):
+    """
+    Yield `(event, data)` pairs for a streamed proposal: 'proposal' events
+    with text deltas as Gemini produces them, then 'done'.
+    """
+    key = proposal_cache_key(model, job_title, job_description, job_budget)
+    if not regenerate:
+        proposal_text = generation_cache.get(key)
+        if proposal_text is not None:
+            yield 'proposal', {'delta': proposal_text}
+            yield 'done', {'cached': True}
+            return
+
+    parts = []
+    with metrics.gemini_call('proposal'):
+        chunks = model.generate_content(proposal_prompt(job_title, job_description, job_budget), stream=True)
+    for chunk in chunks:
+        text = _chunk_text(chunk)
+        if text:
+            parts.append(text)
+            yield 'proposal', {'delta': text}
+
+    proposal_text = ''.join(parts)
+    if not proposal_text:
+        raise GenerationError('Gemini API returned empty response. This may be due to safety filters or content blocks.')
+    generation_cache.set(key, proposal_text)
+    yield 'done', {'cached': False}
+
+
+def stream_application_events(model, job_title, job_description, resume,
+                              regenerate=False, concurrency=None, deadline=None, batch_answers=None):
+    """
+    Yield `(event, data)` pairs for a streamed application package, in order:
+
+    - 'cover_letter': {'delta'} text as Gemini streams it
+    - 'questions': {'questions'} once the cover letter is done
+    - 'answer': {'index', 'question', 'answer'} for each answer as it completes
+    - 'done': {'cached'}
+
+    The questions prompt and the answers run in the background while the
+    cover letter streams, under the same concurrency cap, deadline and
+    `batch_answers` setting as generate_application_package. With batched
+    answers, the answers found in the batched response are sent as soon as it
+    is parsed and the missing ones as their individual retries complete.
+    Raises GenerationError on failure.
+    """
+    key = application_cache_key(model, job_title, job_description, resume)
+    if not regenerate:
+        package = generation_cache.get(key)
+        if package is not None:
+            yield from _replay_package(package)
+            return
+
+    # The deadline covers resume preparation too
+    deadline = deadline or GENERATION_DEADLINE
+    expires_at = time.monotonic() + deadline
+    session = ResumeSession(model, resume)
+    concurrency = max(1, concurrency or GENERATION_CONCURRENCY)
+    if batch_answers is None:
+        batch_answers = GENERATION_BATCH_ANSWERS
+
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        def questions_then_answers():
+            questions_list = generate_questions(model, job_title, job_description)
+            if batch_answers:
+                batch_future = submit_call(
+                    executor, 'answers', session.model.generate_content,
+                    answers_prompt(questions_list, session.context('answers')), deadline=expires_at)
+                return questions_list, batch_future, {}
+            return questions_list, None, _submit_answers(executor, session, questions_list, expires_at)
+
+        questions_future = executor.submit(metrics.in_context(questions_then_answers))
+
+        parts = []
+        with metrics.gemini_call('cover_letter'):
+            chunks = session.model.generate_content(
+                cover_letter_prompt(job_title, job_description, session.context('cover_letter')),
+                stream=True)
+        for chunk in chunks:
+            text = _chunk_text(chunk)
+            if text:
+                parts.append(text)
+                yield 'cover_letter', {'delta': text}
+            if remaining(expires_at) <= 0:
+                raise GenerationError('Timed out generating cover letter', 504)
+        cover_letter = ''.join(parts)
+        if not cover_letter:
+            raise GenerationError('Failed to generate cover letter')
+
+        done, _ = wait([questions_future], timeout=remaining(expires_at))
+        if not done:
+            raise GenerationError('Timed out generating interview questions', 504)
+        questions_list, batch_future, answer_futures = questions_future.result()
+        yield 'questions', {'questions': questions_list}
+
+        answers = {}
+        if batch_future is not None:
+            answers = _batch_answers(batch_future, questions_list, expires_at)
+            for question in questions_list:
+                if question in answers:
+                    yield 'answer', _answer_event(questions_list, question, answers[question])
+            # Only retry the questions the batched call missed
+            missing = [q for q in questions_list if q not in answers]
+            if missing and remaining(expires_at) > 0:
+                answer_futures = _submit_answers(executor, session, missing, expires_at)
+
+        question_of = {future: question for question, future in answer_futures.items()}
+        try:
+            for future in as_completed(question_of, timeout=remaining(expires_at)):
+                question = question_of[future]
+                try:
+                    answer = response_text(future.result())
+                except Exception as e:
+                    logger.error(f"Error generating answer: {str(e)}")
+                    answer = None
+                if answer:
+                    answers[question] = answer.strip()
+                yield 'answer', _answer_event(questions_list, question, answers.get(question))
+        except TimeoutError:
+            logger.warning("Deadline reached with answers pending, using fallback answers")
+            for future, question in question_of.items():
+                if not future.done():
+                    yield 'answer', _answer_event(questions_list, question, None)
+        if batch_future is not None and not answer_futures:
+            # The batched call missed the deadline with no time left for retries
+            for question in questions_list:
+                if question not in answers:
+                    yield 'answer', _answer_event(questions_list, question, None)
+
+        remember_package(key, application_package(cover_letter, questions_list, answers))
+        yield 'done', {'cached': False}
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _replay_package(package):
+    yield 'cover_letter', {'delta': package['cover_letter']}
+    questions_list = [qa['question'] for qa in package['questions']]
+    yield 'questions', {'questions': questions_list}
+    for qa in package['questions']:
+        yield 'answer', _answer_event(questions_list, qa['question'], qa['answer'])
+    yield 'done', {'cached': True}
+
+
+def _answer_event(questions_list, question, answer):
+    return {
+        'index': questions_list.index(question),
+        'question': question,
+        'answer': answer or FALLBACK_ANSWER
+    }
+
+
+def _resume_block(resume):
+    if resume is None:
+        return ''
+    return f"Candidate's Resume:\n{resume}\n\n"
+
+
+def _chunk_text(chunk):
+    # Accessing .text raises ValueError for chunks without text parts (e.g. safety blocks)
+    try:
+        return chunk.text
+    except ValueError:
+        return ''
+
+
+def _model_name(model):
+    return getattr(model, 'model_name', type(model).__name__)
+
+
+def _submit_answers(executor, session, questions, expires_at):
+    return {
+        question: submit_call(
+            executor, 'answer', session.model.generate_content,
+            answer_prompt(question, session.context('answer', question)), deadline=expires_at)
+        for question in questions
+    }
+
+
+def submit_call(executor, call, fn, *args, deadline=None):
+    """
+    Submit a Gemini call labelled `call` in the metrics, keeping the request's
+    timing context. `deadline` (a time.monotonic() value) is passed on to
+    GeminiModel.generate_content so hedged calls stop waiting when it passes.
+    """
+    kwargs = {} if deadline is None else {'deadline': deadline}
+
+    def run():
+        with metrics.gemini_call(call):
+            return fn(*args, **kwargs)
+    return executor.submit(metrics.in_context(run))
+
+
+def _batch_answers(batch_future, questions_list, expires_at):
+    """Wait for a batched answers call until the deadline; return the {question: answer} it parsed."""
+    done, _ = wait([batch_future], timeout=remaining(expires_at))
+    if not done:
+        return {}
+    if batch_future.exception() is not None:
+        logger.error(f"Error generating batched answers: {str(batch_future.exception())}")
+        return {}
+    batch_text = response_text(batch_future.result())
+    return parse_answers(batch_text, questions_list) if batch_text else {}
+
+
+def _collect_answers(answer_futures, expires_at):
+    """Wait for per-question answer futures until the deadline; return {question: answer}."""
+    pending = set(answer_futures.values())
+    while pending:
+        done, pending = wait(pending, timeout=remaining(expires_at),
+                             return_when=FIRST_COMPLETED)
+        if not done:
+            logger.warning(f"Deadline reached with {len(pending)} answers pending, using fallback answers")
+            break
+
+    answers = {}
+    for question, future in answer_futures.items():
+        if not future.done() or future.cancelled():
+            continue
+        if future.exception() is not None:
+            logger.error(f"Error generating answer: {str(future.exception())}")
+            continue
+        answer = response_text(future.result())
+        if answer:
+            answers[question] = answer.strip()
+    return answers
+
+
+def remaining(expires_at):
+    """Seconds left before a time.monotonic() deadline, never negative."""
+    return max(0.0, expires_at - time.monotonic())
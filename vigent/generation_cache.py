@@ -0,0 +1,179 @@
+"""
+Content-addressed cache for generated proposals, application packages and
+per-job interview questions.
+
+Keys hash everything that determines the output (model, prompt template
+version, job fields, resume), so pressing Generate again for the same job and
+resume is served from memory instead of Gemini. Entries are evicted LRU-first
+and expire after GENERATION_CACHE_TTL; an optional directory tier keeps them
+across restarts and workers. Expired files are deleted when read, and writes
+prune the directory down to GENERATION_CACHE_MAX_FILES now and then.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Seconds a generated result is reused
+GENERATION_CACHE_TTL = int(os.environ.get('GENERATION_CACHE_TTL', '86400'))
+
+# Max results kept in memory
+GENERATION_CACHE_SIZE = int(os.environ.get('GENERATION_CACHE_SIZE', '512'))
+
+# Optional directory for the on-disk tier (e.g. /tmp/vigent-generations)
+GENERATION_CACHE_DIR = os.environ.get('GENERATION_CACHE_DIR')
+
+# Max files kept in each on-disk tier directory; the oldest are deleted first
+GENERATION_CACHE_MAX_FILES = int(os.environ.get('GENERATION_CACHE_MAX_FILES', '10000'))
+
+# Seconds between directory prunes by one process
+PRUNE_INTERVAL = 60
+
+# Seconds a job's interview questions are reused; they depend only on the job, not the candidate
+QUESTION_CACHE_TTL = int(os.environ.get('QUESTION_CACHE_TTL', '604800'))
+
+# Max question sets kept in memory
+QUESTION_CACHE_SIZE = int(os.environ.get('QUESTION_CACHE_SIZE', '2048'))
+
+
+def generation_key(kind, model_name, prompt_version, *parts):
+    """Stable key for one generation request; any changed input gives a new key."""
+    payload = json.dumps([kind, model_name, prompt_version, *parts], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class GenerationCache:
+    def __init__(self, max_entries=None, ttl=None, directory=None, max_files=None):
+        self.max_entries = max_entries or GENERATION_CACHE_SIZE
+        self.ttl = ttl or GENERATION_CACHE_TTL
+        self.directory = directory
+        self.max_files = max_files or GENERATION_CACHE_MAX_FILES
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._pruned_at = None
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, key):
+        """Return the cached value for `key`, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+
+        if not self.directory:
+            return None
+        entry = self._read(key)
+        if entry is None:
+            return None
+        if now - entry['created'] >= self.ttl:
+            self._delete(self._path(key))
+            return None
+        self._remember(key, entry['created'], entry['value'])
+        return entry['value']
+
+    def set(self, key, value):
+        created = time.time()
+        self._remember(key, created, value)
+        if self.directory:
+            self._write(key, {'created': created, 'value': value})
+            self._maybe_prune(created)
+
+    def _remember(self, key, created, value):
+        with self._lock:
+            self._entries[key] = (created, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def _read(self, key):
+        try:
+            with open(self._path(key), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable generation cache entry {key}: {str(e)}")
+            return None
+
+    def _write(self, key, entry):
+        try:
+            tmp_path = f'{self._path(key)}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            logger.warning(f"Could not write generation cache entry {key}: {str(e)}")
+
+    def _maybe_prune(self, now):
+        with self._lock:
+            if self._pruned_at is not None and now - self._pruned_at < PRUNE_INTERVAL:
+                return
+            self._pruned_at = now
+        self.prune(now)
+
+    def prune(self, now=None):
+        """
+        Delete expired files (and leftover temp files) from the directory tier,
+        then the oldest ones beyond max_files. Returns the number deleted.
+        """
+        now = now or time.time()
+        files = []
+        deleted = 0
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    try:
+                        modified = entry.stat().st_mtime
+                    except FileNotFoundError:
+                        continue
+                    # A file's mtime is when it was written, i.e. its entry's 'created';
+                    # temp files that old were left behind by a crashed write
+                    if now - modified >= self.ttl:
+                        deleted += self._delete(entry.path)
+                    elif entry.name.endswith('.json'):
+                        files.append((modified, entry.path))
+        except OSError as e:
+            logger.warning(f"Could not prune generation cache directory {self.directory}: {str(e)}")
+            return deleted
+
+        if len(files) > self.max_files:
+            files.sort()
+            for _, path in files[:len(files) - self.max_files]:
+                deleted += self._delete(path)
+        if deleted:
+            logger.info(f"Pruned {deleted} files from {self.directory}")
+        return deleted
+
+    def _delete(self, path):
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            logger.warning(f"Could not delete generation cache file {path}: {str(e)}")
+            return 0
+
+
+generation_cache = GenerationCache(directory=GENERATION_CACHE_DIR)
+
+# Parsed interview questions per job, shared by every candidate applying to it
+question_cache = GenerationCache(
+    QUESTION_CACHE_SIZE, QUESTION_CACHE_TTL,
+    directory=os.path.join(GENERATION_CACHE_DIR, 'questions') if GENERATION_CACHE_DIR else None
+)
@@ -0,0 +1,308 @@
+"""
+Incremental ingestion of job board feeds into the persistent job store, and
+the store-backed read path used by /api/jobs.
+
+Run an ingestion from cron (or Vercel cron) with:
+
+    python -m vigent.ingest [source ...]
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from vigent.feed_cache import FEED_CACHE_TTL, NotModified
+from vigent.feeds import SOURCES, get_jobs, source_names
+from vigent.generation_cache import GENERATION_CACHE_DIR
+from vigent.store import decode_cursor, job_store
+
+logger = logging.getLogger(__name__)
+
+# Generate interview questions for newly ingested jobs ahead of their first
+# application (one Gemini call per new job; needs GEMINI_API_KEY). A one-shot
+# `python -m vigent.ingest` run also needs GENERATION_CACHE_DIR, or the
+# questions would die with the process
+PRECOMPUTE_QUESTIONS = os.environ.get('PRECOMPUTE_QUESTIONS', 'false').lower() == 'true'
+
+# Page size for /api/jobs when no limit is given, and the largest allowed
+DEFAULT_READ_LIMIT = 50
+MAX_READ_LIMIT = 100
+
+# ?date= values accepted by /api/jobs, in days
+DATE_RANGES = {
+    'today': 1,
+    'week': 7,
+    'month': 30
+}
+
+
+def ingest(names=None, store=None, precompute=None):
+    """
+    Fetch each source (all registered sources by default) and upsert its
+    jobs into the store. Conditional requests use the validators saved by the
+    previous run, so an unchanged feed is skipped without parsing, and only
+    jobs not already stored are enriched (see vigent.enrich). With
+    `precompute` (default PRECOMPUTE_QUESTIONS) new jobs also get their
+    interview questions generated into the question cache.
+    Returns {source: {'status', 'fetched', 'new', 'error'}}.
+    """
+    store = store or job_store
+    if precompute is None:
+        precompute = PRECOMPUTE_QUESTIONS and bool(os.environ.get('GEMINI_API_KEY'))
+    results = {}
+    for name in names or list(SOURCES):
+        source = SOURCES[name]
+        state = store.get_feed_state(name) or {}
+        try:
+            jobs, validators = source.fetch({
+                'etag': state.get('etag'),
+                'modified': state.get('modified')
+            }, known=store.has_job)
+        except NotModified:
+            store.set_feed_state(name, state)
+            results[name] = {'status': 'not_modified', 'fetched': 0, 'new': 0, 'error': None}
+            continue
+        except Exception as e:
+            logger.error(f"Error ingesting {name} feed: {str(e)}")
+            results[name] = {'status': 'error', 'fetched': 0, 'new': 0, 'error': str(e)}
+            continue
+
+        new_jobs = store.upsert_jobs(name, jobs)
+        store.set_feed_state(name, validators)
+        if precompute and new_jobs:
+            _precompute_questions(name, new_jobs)
+        logger.info(f"Ingested {name}: {len(jobs)} fetched, {len(new_jobs)} new")
+        results[name] = {'status': 'ok', 'fetched': len(jobs), 'new': len(new_jobs), 'error': None}
+    return results
+
+
+def parse_job_query(params):
+    """
+    Turn /api/jobs query parameters into read_jobs keyword arguments.
+    Raises ValueError with a user-facing message for invalid values.
+
+    - source: source name or label (remotive, Remotive, ...), or all
+    - job_type: Full-time, Part-time or Contract
+    - location: Remote, Anywhere, US, Europe, ...
+    - date: today, week or month (or since: an ISO timestamp)
+    - limit: page size (default DEFAULT_READ_LIMIT, max MAX_READ_LIMIT)
+    - cursor: next_cursor from the previous page
+    """
+    query = {
+        'source': params.get('source') or 'all',
+        'job_type': _filter_value(params.get('job_type')),
+        'location': _filter_value(params.get('location')),
+        'since': params.get('since') or None,
+        'cursor': params.get('cursor') or None
+    }
+
+    if query['cursor']:
+        decode_cursor(query['cursor'])
+
+    date_range = _filter_value(params.get('date'))
+    if date_range:
+        if date_range not in DATE_RANGES:
+            raise ValueError(f"Invalid date filter '{date_range}', expected one of: {', '.join(DATE_RANGES)}")
+        cutoff = datetime.now(timezone.utc) - timedelta(days=DATE_RANGES[date_range])
+        # Feed dates are stored as naive UTC ISO strings
+        query['since'] = cutoff.replace(tzinfo=None).isoformat(timespec='seconds')
+
+    try:
+        limit = int(params.get('limit') or DEFAULT_READ_LIMIT)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    query['limit'] = max(1, min(limit, MAX_READ_LIMIT))
+    return query
+
+
+def read_jobs(source='all', job_type=None, location=None, since=None,
+              limit=None, cursor=None, store=None):
+    """
+    Return `(jobs, sources, next_cursor)` for /api/jobs: one filtered page
+    from the job store, newest first.
+
+    Reads are a local indexed query. Only a source that has never been
+    ingested into this store (e.g. a fresh serverless instance) is bootstrapped
+    from the cached live feeds once; sources ingested longer ago than their
+    TTL are re-ingested in the background while the stored jobs are served.
+    """
+    store = store or job_store
+    names = source_names(source)
+    if not names:
+        return [], {}, None
+
+    sources = _bootstrap(store, names)
+
+    started = time.perf_counter()
+    jobs, next_cursor = store.list_jobs(
+        names,
+        job_type=job_type,
+        location=location,
+        since=since,
+        limit=limit or DEFAULT_READ_LIMIT,
+        cursor=cursor
+    )
+    latency_ms = round((time.perf_counter() - started) * 1000, 1)
+    for name in names:
+        if name not in sources:
+            sources[name] = {
+                'status': 'ok',
+                'count': sum(1 for job in jobs if job['source'] == SOURCES[name].label),
+                'latency_ms': latency_ms,
+                'error': None
+            }
+    return jobs, sources, next_cursor
+
+
+def parse_search_query(params):
+    """
+    Turn /api/jobs/search query parameters into search_jobs keyword arguments:
+    q (required) plus the /api/jobs filters, limit, and offset for paging.
+    """
+    text = (params.get('q') or '').strip()
+    if not text:
+        raise ValueError('Search query (q) is required')
+
+    query = parse_job_query(dict(params, cursor=None))
+    del query['cursor']
+    try:
+        query['offset'] = max(0, int(params.get('offset') or 0))
+    except ValueError:
+        raise ValueError('offset must be an integer')
+    query['text'] = text
+    return query
+
+
+def search_jobs(text, source='all', job_type=None, location=None, since=None,
+                limit=None, offset=0, store=None):
+    """
+    Return `(jobs, next_offset)` for /api/jobs/search: stored jobs matching
+    `text`, ranked by BM25 over titles and descriptions, with the same
+    filters as read_jobs. next_offset is None on the last page.
+    """
+    store = store or job_store
+    names = source_names(source)
+    if not names:
+        return [], None
+
+    _bootstrap(store, names)
+
+    limit = limit or DEFAULT_READ_LIMIT
+    jobs, has_more = store.search_jobs(
+        text,
+        names,
+        job_type=job_type,
+        location=location,
+        since=since,
+        limit=limit,
+        offset=offset
+    )
+    return jobs, offset + limit if has_more else None
+
+
+def _precompute_questions(name, jobs):
+    # Loaded here so request handlers that only read the store never import Gemini
+    from vigent.gemini import get_model
+    from vigent.generation import precompute_questions
+
+    try:
+        generated = precompute_questions(get_model(), jobs)
+        logger.info(f"Precomputed interview questions for {generated} new {name} jobs")
+    except Exception as e:
+        logger.error(f"Error precomputing interview questions for {name}: {str(e)}")
+
+
+def _bootstrap(store, names):
+    """
+    Fill the store from the cached live feeds for sources it has never
+    ingested, and start a background re-ingestion of the stale ones (see
+    _revalidate). Returns the per-source status map of the bootstrap fetch.
+    """
+    states = store.get_poll_schedules()
+    # A feed_state row can exist before the first ingestion (a claimed poll)
+    missing = [name for name in names if not (states.get(name) or {}).get('last_ingested')]
+    _revalidate(store, [name for name in names if name not in missing and _is_stale(name, states[name])])
+    if not missing:
+        return {}
+
+    live_jobs, sources = get_jobs(names=missing)
+    for name in missing:
+        if sources[name]['status'] != 'ok':
+            continue
+        label = SOURCES[name].label
+        store.upsert_jobs(name, [job for job in live_jobs if job['source'] == label])
+        store.set_feed_state(name)
+    return sources
+
+
+def _is_stale(name, state, now=None):
+    """True if the source was last ingested more than its TTL ago and no poll is scheduled before now."""
+    now = now or datetime.now(timezone.utc)
+    if state.get('next_poll') and state['next_poll'] > now.isoformat():
+        return False
+    age = (now - datetime.fromisoformat(state['last_ingested'])).total_seconds()
+    return age >= (SOURCES[name].ttl or FEED_CACHE_TTL)
+
+
+# Sources being re-ingested by this process
+_revalidating = set()
+_revalidating_lock = threading.Lock()
+
+
+def _revalidate(store, names):
+    """
+    Re-ingest `names` in a background thread (stale-while-revalidate), for
+    processes without the background refresher such as Vercel functions.
+    Polls are claimed through the store, so workers sharing it don't
+    duplicate them.
+    """
+    with _revalidating_lock:
+        names = [name for name in names if name not in _revalidating]
+        _revalidating.update(names)
+    if names:
+        threading.Thread(target=_run_revalidation, args=(store, names),
+                         name='feed-revalidate', daemon=True).start()
+
+
+def _run_revalidation(store, names):
+    # The refresher module imports this one
+    from vigent.refresher import refresh_due
+
+    try:
+        refresh_due(names, store=store)
+    except Exception as e:
+        logger.error(f"Error re-ingesting {', '.join(names)}: {str(e)}")
+    finally:
+        with _revalidating_lock:
+            _revalidating.difference_update(names)
+
+
+def _filter_value(value):
+    """Treat missing, empty and 'all' filter values as no filter."""
+    if not value or value == 'all':
+        return None
+    return value
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO)
+    names = (argv if argv is not None else sys.argv[1:]) or None
+    unknown = [name for name in names or [] if name not in SOURCES]
+    if unknown:
+        print(f"Unknown source(s): {', '.join(unknown)}. Available: {', '.join(SOURCES)}")
+        return 2
+    precompute = None
+    if PRECOMPUTE_QUESTIONS and not GENERATION_CACHE_DIR:
+        logger.warning("Not precomputing interview questions: without GENERATION_CACHE_DIR "
+                       "they would only be cached in this process, which exits after ingesting")
+        precompute = False
+    results = ingest(names, precompute=precompute)
+    for name, result in results.items():
+        print(f"{name}: {result['status']} (fetched {result['fetched']}, new {result['new']})")
+    return 1 if all(r['status'] == 'error' for r in results.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
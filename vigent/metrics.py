@@ -0,0 +1,225 @@
+"""
+Lightweight in-process instrumentation.
+
+Histograms and counters are rendered in the Prometheus text format by
+/api/metrics. They live in the memory of the process that serves the
+request, so under gunicorn each worker reports only its own traffic; every
+series carries a `pid` label so scrapes of different workers can be told
+apart and summed.
+
+Work done on behalf of a request is also summed per name (gemini, feeds,
+store, ...) into that request's Server-Timing header; spans recorded in
+worker threads count too, as long as the work was submitted with
+in_context().
+"""
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds: fast store reads up to slow generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 60)
+
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+BYTE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+ENTRY_BUCKETS = (0, 5, 10, 25, 50, 100, 250, 500)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(label, '')) for label in self.labels)
+
+    def _label_text(self, key, extra=None):
+        # Read at render time: workers forked after import have their own pid
+        pairs = list(zip(self.labels, key)) + [('pid', str(os.getpid()))] + (extra or [])
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            series = sorted(self._series.items())
+        for key, value in series:
+            lines.extend(self._render_series(key, value))
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def _render_series(self, key, value):
+        return [f'{self.name}{self._label_text(key)} {_number(value)}']
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def _render_series(self, key, series):
+        lines = [
+            f'{self.name}_bucket{self._label_text(key, [("le", _number(bound))])} {count}'
+            for bound, count in zip(self.buckets, series['counts'])
+        ]
+        lines.append(f'{self.name}_bucket{self._label_text(key, [("le", "+Inf")])} {series["count"]}')
+        lines.append(f'{self.name}_sum{self._label_text(key)} {_number(series["sum"])}')
+        lines.append(f'{self.name}_count{self._label_text(key)} {series["count"]}')
+        return lines
+
+
+REGISTRY = []
+
+http_request_duration = Histogram(
+    'vigent_http_request_duration_seconds', 'Time to build each response, by route',
+    ['route', 'method', 'status'])
+
+gemini_call_duration = Histogram(
+    'vigent_gemini_call_duration_seconds', 'Latency of each Gemini call, by generation step',
+    ['call', 'outcome'])
+gemini_prompt_tokens = Histogram(
+    'vigent_gemini_prompt_tokens', 'Prompt tokens per Gemini call', ['call'], TOKEN_BUCKETS)
+gemini_response_tokens = Histogram(
+    'vigent_gemini_response_tokens', 'Response tokens per Gemini call', ['call'], TOKEN_BUCKETS)
+gemini_cached_tokens = Counter(
+    'vigent_gemini_cached_tokens_total', 'Prompt tokens served from Gemini context caches', ['call'])
+gemini_retries = Counter(
+    'vigent_gemini_retries_total', 'Gemini calls retried after a 429/5xx, by status', ['status'])
+gemini_rate_limit_wait = Histogram(
+    'vigent_gemini_rate_limit_wait_seconds', 'Time Gemini calls waited for the shared rate limiter')
+
+feed_fetch_duration = Histogram(
+    'vigent_feed_fetch_duration_seconds', 'Feed download time, by HTTP status', ['source', 'status'])
+feed_response_bytes = Histogram(
+    'vigent_feed_response_bytes', 'Feed bytes transferred per fetch', ['source'], BYTE_BUCKETS)
+feed_parse_duration = Histogram(
+    'vigent_feed_parse_duration_seconds', 'Feed parse time', ['source'])
+feed_entries = Histogram(
+    'vigent_feed_entries', 'Entries parsed per feed fetch', ['source'], ENTRY_BUCKETS)
+
+
+def render_metrics():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+class RequestTimings:
+    """Per-request span totals for the Server-Timing header."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            total, count = self._spans.get(name, (0.0, 0))
+            self._spans[name] = (total + seconds, count + 1)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def header(self):
+        with self._lock:
+            spans = dict(self._spans)
+        parts = [
+            f'{name};dur={total * 1000:.1f};desc="{count} call{"s" if count != 1 else ""}"'
+            for name, (total, count) in spans.items()
+        ]
+        parts.append(f'total;dur={self.elapsed() * 1000:.1f}')
+        return ', '.join(parts)
+
+
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+_gemini_call = contextvars.ContextVar('gemini_call', default='other')
+
+
+def start_request():
+    """Begin collecting Server-Timing spans for the current request; returns the collector."""
+    timings = RequestTimings()
+    _request_timings.set(timings)
+    return timings
+
+
+def current_request():
+    return _request_timings.get()
+
+
+def record_span(name, seconds):
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def span(name):
+    """Time a block into the current request's Server-Timing `name` entry."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - started)
+
+
+@contextmanager
+def gemini_call(call):
+    """Label the Gemini calls made in this block (e.g. 'cover_letter') in the metrics."""
+    token = _gemini_call.set(call)
+    try:
+        yield
+    finally:
+        _gemini_call.reset(token)
+
+
+def current_gemini_call():
+    return _gemini_call.get()
+
+
+def in_context(fn):
+    """Wrap `fn` to run in a copy of the current context (request timings, call label) in another thread."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+def _number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
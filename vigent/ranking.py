@@ -0,0 +1,209 @@
+"""
+Resume-to-job relevance ranking.
+
+Job term vectors are computed once at ingestion (vigent.vectorize) and kept
+here as one contiguous, IDF-weighted, L2-normalized float32 matrix, rebuilt
+only when the job store changes. Ranking a resume is a single matrix-vector
+product. Resume vectors are saved in the job store by a content fingerprint,
+so clients can send the resume once and then rank with ?resume_hash= on any
+worker; each process keeps recently used ones in memory in front of that.
+
+NumPy is imported on first use, so plain job listings that import this
+module for parse_rank_query don't pay for it on a cold start.
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from vigent.feeds import source_names
+from vigent.ingest import DEFAULT_READ_LIMIT, parse_job_query
+from vigent.store import job_store
+from vigent.vectorize import VECTOR_DIM, term_counts
+
+logger = logging.getLogger(__name__)
+
+# Resume term vectors kept in memory by each process, by fingerprint
+RESUME_CACHE_SIZE = 256
+
+
+class JobMatrix:
+    def __init__(self, store):
+        self.store = store
+        self.version = None
+        self.ids = []
+        self.index = {}
+        # Built by refresh()
+        self.matrix = None
+        self.idf = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Rebuild the matrix if jobs were added since the last build."""
+        version = self.store.version()
+        if version == self.version:
+            return
+        np = _numpy()
+        with self._lock:
+            if version == self.version:
+                return
+            rows = self.store.load_job_terms()
+            matrix = np.zeros((len(rows), VECTOR_DIM), dtype=np.float32)
+            for row_index, (_, terms) in enumerate(rows):
+                if terms:
+                    matrix[row_index, list(terms)] = list(terms.values())
+
+            # Sublinear TF, smoothed IDF over the stored jobs, unit-length rows
+            np.log1p(matrix, out=matrix)
+            document_frequency = np.count_nonzero(matrix, axis=0)
+            idf = (np.log((len(rows) + 1) / (document_frequency + 1)) + 1).astype(np.float32)
+            matrix *= idf
+            _normalize_rows(matrix)
+
+            self.ids = [job_id for job_id, _ in rows]
+            self.index = {job_id: row_index for row_index, job_id in enumerate(self.ids)}
+            self.matrix = np.ascontiguousarray(matrix)
+            self.idf = idf
+            self.version = version
+            logger.info(f"Built ranking matrix for {len(rows)} jobs")
+
+    def score(self, terms):
+        """Cosine similarity of every job to a {dimension: count} vector."""
+        np = _numpy()
+        vector = np.zeros(VECTOR_DIM, dtype=np.float32)
+        if terms:
+            vector[list(terms)] = list(terms.values())
+        np.log1p(vector, out=vector)
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return self.matrix @ vector
+
+
+job_matrix = JobMatrix(job_store)
+
+_resume_terms = OrderedDict()
+_resume_lock = threading.Lock()
+
+
+def resume_fingerprint(resume):
+    return hashlib.sha256(resume.encode('utf-8')).hexdigest()[:32]
+
+
+def remember_resume(resume, store=None):
+    """Vectorize a resume, save its vector to the job store and return its fingerprint."""
+    fingerprint = resume_fingerprint(resume)
+    with _resume_lock:
+        terms = _resume_terms.get(fingerprint)
+    if terms is None:
+        terms = term_counts(resume)
+        _remember_terms(fingerprint, terms)
+    # Saved on every send, so the stored copy outlives this process and
+    # stays fresh for as long as the client keeps using the resume
+    (store or job_store).save_resume_terms(fingerprint, terms)
+    return fingerprint
+
+
+def resume_terms(fingerprint, store=None):
+    """The vector for a resume fingerprint from this process or the job store, or None."""
+    with _resume_lock:
+        terms = _resume_terms.get(fingerprint)
+        if terms is not None:
+            _resume_terms.move_to_end(fingerprint)
+            return terms
+    terms = (store or job_store).get_resume_terms(fingerprint)
+    if terms is not None:
+        _remember_terms(fingerprint, terms)
+    return terms
+
+
+def _remember_terms(fingerprint, terms):
+    with _resume_lock:
+        _resume_terms[fingerprint] = terms
+        _resume_terms.move_to_end(fingerprint)
+        while len(_resume_terms) > RESUME_CACHE_SIZE:
+            _resume_terms.popitem(last=False)
+
+
+def parse_rank_query(params):
+    """
+    Turn /api/jobs ranking parameters into rank_jobs keyword arguments:
+    resume or resume_hash, plus the /api/jobs filters, limit and offset.
+    """
+    query = parse_job_query(dict(params, cursor=None))
+    del query['cursor']
+    try:
+        query['offset'] = max(0, int(params.get('offset') or 0))
+    except ValueError:
+        raise ValueError('offset must be an integer')
+    query['resume'] = params.get('resume') or None
+    query['resume_hash'] = params.get('resume_hash') or None
+    for name in ('resume', 'resume_hash'):
+        if query[name] is not None and not isinstance(query[name], str):
+            raise ValueError(f'{name} must be a string')
+    if not query['resume'] and not query['resume_hash']:
+        raise ValueError('resume or resume_hash is required for ranking')
+    return query
+
+
+def rank_jobs(resume=None, resume_hash=None, source='all', job_type=None,
+              location=None, since=None, limit=None, offset=0, store=None):
+    """
+    Return `(jobs, next_offset, resume_hash)`: stored jobs matching the
+    filters, most similar to the resume first, each with its 'score'.
+    Raises ValueError if only an unknown resume_hash is given.
+    """
+    if resume:
+        resume_hash = remember_resume(resume, store)
+    terms = resume_terms(resume_hash, store)
+    if terms is None:
+        raise ValueError('Unknown resume_hash; send the resume text instead')
+
+    matrix = job_matrix if store is None else JobMatrix(store)
+    matrix.refresh()
+    if not matrix.ids:
+        return [], None, resume_hash
+
+    np = _numpy()
+    scores = matrix.score(terms)
+    names = source_names(source)
+    if set(names) != set(source_names('all')) or job_type or location or since:
+        allowed = matrix.store.list_job_ids(names, job_type=job_type, location=location, since=since)
+        rows = np.fromiter(
+            (matrix.index[job_id] for job_id in allowed if job_id in matrix.index),
+            dtype=np.intp
+        )
+    else:
+        rows = np.arange(len(matrix.ids))
+
+    limit = limit or DEFAULT_READ_LIMIT
+    end = offset + limit
+    candidate_scores = scores[rows]
+    if end < len(rows):
+        # Only the top `end` rows need sorting
+        top = np.argpartition(-candidate_scores, end)[:end]
+    else:
+        top = np.arange(len(rows))
+    top = top[np.argsort(-candidate_scores[top], kind='stable')][offset:end]
+
+    ranked_scores = {
+        matrix.ids[rows[i]]: round(float(candidate_scores[i]), 4)
+        for i in top
+    }
+    jobs = matrix.store.get_jobs(list(ranked_scores))
+    for job in jobs:
+        job['score'] = ranked_scores[job['id']]
+    return jobs, end if end < len(rows) else None, resume_hash
+
+
+def _numpy():
+    import numpy
+    return numpy
+
+
+def _normalize_rows(matrix):
+    np = _numpy()
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    matrix /= norms
@@ -0,0 +1,170 @@
+"""
+Background feed refresher.
+
+Polls each registered source on its own schedule and ingests it into the job
+store, so user-facing reads only ever query the store. Each source's poll
+interval adapts to how often its feed actually changes: it halves when a poll
+finds new jobs and grows by half when the feed is unchanged, within the
+source's bounds, so upstream load follows real change frequency.
+
+The schedule lives in the store's feed_state table, so processes sharing a
+store share it too (a due poll is claimed atomically by one of them). Run it
+as a thread inside the Flask app (FEED_REFRESHER=true, the default outside
+Vercel) or from cron:
+
+    python -m vigent.refresher           # poll the sources that are due, then exit
+    python -m vigent.refresher --loop    # keep polling
+"""
+import logging
+import os
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+
+from vigent.feed_cache import FEED_CACHE_TTL
+from vigent.feeds import SOURCES
+from vigent.ingest import ingest
+from vigent.store import job_store
+
+logger = logging.getLogger(__name__)
+
+# Run the refresher thread inside the Flask app; Vercel freezes background threads
+FEED_REFRESHER = os.environ.get(
+    'FEED_REFRESHER', 'false' if os.environ.get('VERCEL') else 'true'
+).lower() == 'true'
+
+# Bounds for each source's adaptive poll interval, in seconds
+FEED_POLL_MIN_INTERVAL = float(os.environ.get('FEED_POLL_MIN_INTERVAL', '120'))
+FEED_POLL_MAX_INTERVAL = float(os.environ.get('FEED_POLL_MAX_INTERVAL', '3600'))
+
+# Interval multipliers after a poll that found new jobs / found nothing new / failed
+SPEEDUP = 0.5
+SLOWDOWN = 1.5
+ERROR_BACKOFF = 2.0
+
+# Seconds a claimed poll is reserved before another worker may retry it
+POLL_LEASE = 300
+
+
+def poll_bounds(source):
+    return (
+        source.min_interval or FEED_POLL_MIN_INTERVAL,
+        source.max_interval or FEED_POLL_MAX_INTERVAL
+    )
+
+
+def next_interval(source, interval, result):
+    """The poll interval after an ingestion `result` ({'status', 'new'}), within the source's bounds."""
+    low, high = poll_bounds(source)
+    interval = interval or source.ttl or FEED_CACHE_TTL
+    if result['status'] == 'error':
+        interval *= ERROR_BACKOFF
+    elif result['new']:
+        interval *= SPEEDUP
+    else:
+        interval *= SLOWDOWN
+    return min(high, max(low, interval))
+
+
+def refresh_due(names=None, store=None, now=None):
+    """
+    Ingest every source (of `names`, default all) whose next poll is due and
+    reschedule it. Returns {source: ingestion result plus 'interval'} for the
+    sources polled.
+    """
+    store = store or job_store
+    now = now or datetime.now(timezone.utc)
+    schedules = store.get_poll_schedules()
+    results = {}
+    for name in names or list(SOURCES):
+        source = SOURCES[name]
+        schedule = schedules.get(name) or {}
+        next_poll = schedule.get('next_poll')
+        if next_poll and next_poll > now.isoformat():
+            continue
+        lease_until = (now + timedelta(seconds=POLL_LEASE)).isoformat()
+        if not store.claim_poll(name, now.isoformat(), lease_until):
+            continue
+
+        result = ingest([name], store=store)[name]
+        interval = next_interval(source, schedule.get('poll_interval'), result)
+        store.set_poll_schedule(
+            name, interval,
+            (datetime.now(timezone.utc) + timedelta(seconds=interval)).isoformat(),
+            changed=bool(result['new'])
+        )
+        logger.info(f"Polled {name}: {result['status']}, {result['new']} new, next poll in {interval:.0f}s")
+        results[name] = dict(result, interval=interval)
+    return results
+
+
+def seconds_until_next_poll(store=None):
+    """Seconds until the earliest scheduled poll (0 if one is due or unscheduled)."""
+    store = store or job_store
+    schedules = store.get_poll_schedules()
+    now = datetime.now(timezone.utc)
+    waits = []
+    for name in SOURCES:
+        next_poll = (schedules.get(name) or {}).get('next_poll')
+        if not next_poll:
+            return 0
+        waits.append((datetime.fromisoformat(next_poll) - now).total_seconds())
+    return max(0, min(waits)) if waits else FEED_POLL_MAX_INTERVAL
+
+
+class FeedRefresher(threading.Thread):
+    """Daemon thread that runs refresh_due whenever the next source is due."""
+
+    # Longest sleep between schedule checks, so new sources and shared schedules are noticed
+    MAX_SLEEP = 60
+
+    def __init__(self, store=None):
+        super().__init__(name='feed-refresher', daemon=True)
+        self.store = store or job_store
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                refresh_due(store=self.store)
+                delay = seconds_until_next_poll(self.store)
+            except Exception as e:
+                logger.error(f"Feed refresher error: {str(e)}")
+                delay = self.MAX_SLEEP
+            self.stopped.wait(min(max(delay, 1), self.MAX_SLEEP))
+
+    def stop(self):
+        self.stopped.set()
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def start_refresher(store=None):
+    """Start the process-wide refresher thread once; returns it."""
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = FeedRefresher(store)
+            _refresher.start()
+        return _refresher
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO)
+    argv = sys.argv[1:] if argv is None else argv
+    if '--loop' in argv:
+        refresher = FeedRefresher()
+        refresher.run()
+        return 0
+    results = refresh_due()
+    for name, result in results.items():
+        print(f"{name}: {result['status']} (new {result['new']}, next poll in {result['interval']:.0f}s)")
+    if not results:
+        print("No sources due")
+    return 1 if results and all(r['status'] == 'error' for r in results.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+Resume preprocessing for generation prompts.
+
+A resume is parsed once per content hash into a compact profile: whitespace
+normalized, boilerplate dropped, and split into sections (summary, skills,
+experience, projects, ...). Prompts then carry only the sections relevant to
+them via resume_context, instead of the raw resume every time.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from vigent.vectorize import tokenize
+
+# Parsed resumes kept in memory, by content hash
+RESUME_PROFILE_CACHE_SIZE = 256
+
+# Most recent roles kept from the experience section
+MAX_ROLES = 4
+
+# Section name -> headings that start it (compared lowercased, without trailing ':')
+SECTION_HEADINGS = {
+    'summary': ['summary', 'professional summary', 'profile', 'about', 'about me', 'objective',
+                'career objective'],
+    'skills': ['skills', 'technical skills', 'core skills', 'key skills', 'core competencies',
+               'competencies', 'technologies', 'tech stack', 'tools', 'tools & technologies'],
+    'experience': ['experience', 'work experience', 'professional experience', 'employment',
+                   'employment history', 'work history', 'career history', 'roles'],
+    'projects': ['projects', 'personal projects', 'selected projects', 'key projects',
+                 'side projects', 'portfolio'],
+    'education': ['education', 'academic background', 'qualifications'],
+    'certifications': ['certifications', 'certificates', 'licenses', 'awards', 'achievements'],
+    'references': ['references'],
+    'other': ['interests', 'hobbies', 'languages', 'volunteering', 'publications']
+}
+
+HEADING_LOOKUP = {
+    heading: section
+    for section, headings in SECTION_HEADINGS.items()
+    for heading in headings
+}
+
+# Sections each prompt carries; 'header' is the text above the first heading
+PURPOSE_SECTIONS = {
+    'cover_letter': ['header', 'summary', 'skills', 'experience', 'projects', 'education',
+                     'certifications'],
+    'answers': ['header', 'summary', 'skills', 'experience', 'projects'],
+    'answer': ['summary', 'skills', 'experience']
+}
+
+# Extra sections a single answer pulls in when the question mentions them
+QUESTION_SECTIONS = {
+    'projects': ['project', 'built', 'portfolio', 'challenging', 'proud'],
+    'education': ['education', 'degree', 'study', 'studied', 'university', 'college'],
+    'certifications': ['certif', 'award', 'achievement']
+}
+
+BOILERPLATE_RE = re.compile(
+    r'^(references? (are )?available (up)?on request\.?|page \d+( of \d+)?|curriculum vitae|resume|cv)$',
+    re.IGNORECASE
+)
+BULLET_RE = re.compile(r'^[•●▪◦‣∙·*]\s*')
+
+
+def resume_hash(resume):
+    return hashlib.sha256((resume or '').encode('utf-8')).hexdigest()
+
+
+def normalize_resume(resume):
+    """Collapse runs of spaces, unify bullets and drop blank-line runs and boilerplate lines."""
+    lines = []
+    for line in (resume or '').replace('\r\n', '\n').replace('\r', '\n').split('\n'):
+        line = BULLET_RE.sub('- ', ' '.join(line.split()))
+        if BOILERPLATE_RE.match(line):
+            continue
+        if not line and (not lines or not lines[-1]):
+            continue
+        lines.append(line)
+    return '\n'.join(lines).strip()
+
+
+def parse_sections(text):
+    """Split normalized resume text into {section: text}, in resume order."""
+    sections = OrderedDict()
+    current = 'header'
+    for line in text.split('\n'):
+        section = _heading_section(line)
+        if section:
+            current = section
+            continue
+        sections.setdefault(current, []).append(line)
+    return OrderedDict(
+        (section, '\n'.join(lines).strip())
+        for section, lines in sections.items()
+        if '\n'.join(lines).strip()
+    )
+
+
+def split_roles(experience):
+    """Blank-line separated blocks of the experience section (one per role)."""
+    return [block.strip() for block in experience.split('\n\n') if block.strip()]
+
+
+class ResumeProfiles:
+    """Thread-safe LRU of parsed resumes keyed by content hash."""
+
+    def __init__(self, max_entries=RESUME_PROFILE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, resume):
+        key = resume_hash(resume)
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is not None:
+                self._profiles.move_to_end(key)
+                return profile
+
+        profile = _build_profile(key, resume)
+        with self._lock:
+            self._profiles[key] = profile
+            self._profiles.move_to_end(key)
+            while len(self._profiles) > self.max_entries:
+                self._profiles.popitem(last=False)
+        return profile
+
+
+resume_profiles = ResumeProfiles()
+
+
+def prepare_resume(resume):
+    """
+    The parsed profile for `resume`: {'hash', 'text', 'sections'}. 'text' is
+    the normalized resume and 'sections' maps section names to their text
+    ('experience' already trimmed to the MAX_ROLES most recent roles).
+    Memoized by content hash, so repeat calls are a dict lookup.
+    """
+    return resume_profiles.get(resume)
+
+
+def resume_context(profile, purpose, question=None):
+    """
+    The part of a prepared resume a prompt needs. `purpose` is one of
+    PURPOSE_SECTIONS; for 'answer', sections named by the `question` are added.
+    Resumes without recognizable headings are returned whole (normalized).
+    """
+    sections = profile['sections']
+    if set(sections) <= {'header'}:
+        return profile['text']
+
+    wanted = list(PURPOSE_SECTIONS[purpose])
+    if purpose == 'answer' and question:
+        question_text = ' '.join(tokenize(question))
+        for section, keywords in QUESTION_SECTIONS.items():
+            if any(keyword in question_text for keyword in keywords):
+                wanted.append(section)
+        # Keep the candidate's intro when the resume has no summary section
+        if 'summary' not in sections:
+            wanted.insert(0, 'header')
+
+    parts = []
+    for section in sections:
+        if section not in wanted:
+            continue
+        if section == 'header':
+            parts.append(sections[section])
+        else:
+            parts.append(f"{section.title()}:\n{sections[section]}")
+    return '\n\n'.join(parts) or profile['text']
+
+
+def _build_profile(key, resume):
+    text = normalize_resume(resume)
+    sections = parse_sections(text)
+    if 'experience' in sections:
+        sections['experience'] = '\n\n'.join(split_roles(sections['experience'])[:MAX_ROLES])
+    return {'hash': key, 'text': text, 'sections': sections}
+
+
+def _heading_section(line):
+    heading = line.strip('#*_=- ').rstrip(':').strip().lower()
+    if not heading or len(heading) > 40:
+        return None
+    return HEADING_LOOKUP.get(heading)
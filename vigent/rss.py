@@ -0,0 +1,176 @@
+"""
+Incremental RSS / Atom parsing.
+
+iter_entries() feeds the response to a pull parser in fixed-size chunks and
+yields each <item> (or Atom <entry>) as soon as its end tag arrives, as a dict
+with the same keys feedparser gives entries (title, link, summary, published,
+published_parsed, tags, ...). Finished elements are detached from the tree,
+so memory stays flat however large the feed is, and a caller that stops
+iterating early never downloads the rest of the document.
+"""
+import logging
+import time
+import zlib
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from xml.etree.ElementTree import ParseError, XMLPullParser, tostring
+
+try:
+    # feedparser's sanitizer, so summaries match those of the non-streaming
+    # path; it is private, so a feedparser release may move it
+    from feedparser.sanitizer import _sanitize_html
+except ImportError:
+    _sanitize_html = None
+
+logger = logging.getLogger(__name__)
+
+# False when feedparser's sanitizer can't be imported; feeds are then parsed
+# with feedparser itself instead of streamed
+AVAILABLE = _sanitize_html is not None
+if not AVAILABLE:
+    logger.warning("feedparser.sanitizer._sanitize_html not found, streaming feed parsing disabled")
+
+# Bytes read from the response per parser feed
+READ_CHUNK_BYTES = 64 * 1024
+
+ENTRY_TAGS = {'item', 'entry'}
+
+# Default namespaces of Atom and RSS 1.0, whose elements are read like plain RSS 2.0 ones
+FEED_NAMESPACES = {'', 'http://www.w3.org/2005/Atom', 'http://purl.org/rss/1.0/'}
+
+# Entry elements -> feedparser's key for them
+DATE_KEYS = {'pubDate': 'published', 'published': 'published', 'date': 'published', 'updated': 'updated'}
+SUMMARY_KEYS = {'description': 'summary', 'summary': 'summary'}
+
+__all__ = ['AVAILABLE', 'ParseError', 'iter_entries']
+
+
+class FeedStats:
+    """Time spent reading and parsing, bytes read and entries yielded by one iter_entries() run."""
+
+    def __init__(self):
+        self.read_seconds = 0.0
+        self.parse_seconds = 0.0
+        self.bytes = 0
+        self.entries = 0
+
+
+def iter_entries(response, stats=None, gzipped=False):
+    """
+    Yield feed entries from the file-like `response` (read with .read(n))
+    while it downloads. Raises ParseError if the document isn't well-formed
+    XML. `stats` (a FeedStats) is updated as the feed is read.
+    """
+    stats = stats or FeedStats()
+    parser = XMLPullParser(events=('start', 'end'))
+    decompress = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+    # Open elements, outermost first, so finished entries can be detached from their parent
+    stack = []
+    while True:
+        started = time.perf_counter()
+        chunk = response.read(READ_CHUNK_BYTES)
+        stats.read_seconds += time.perf_counter() - started
+        stats.bytes += len(chunk)
+
+        started = time.perf_counter()
+        data = chunk
+        if decompress is not None:
+            data = decompress.decompress(chunk) if chunk else decompress.flush()
+        if data:
+            parser.feed(data)
+        if not chunk:
+            parser.close()
+        entries = []
+        for event, element in parser.read_events():
+            if event == 'start':
+                stack.append(element)
+                continue
+            stack.pop()
+            if _local(element.tag) in ENTRY_TAGS and _inside_feed(stack):
+                entries.append(_entry(element))
+                if stack:
+                    stack[-1].remove(element)
+        stats.parse_seconds += time.perf_counter() - started
+
+        for entry in entries:
+            stats.entries += 1
+            yield entry
+        if not chunk:
+            return
+
+
+def _inside_feed(stack):
+    # RSS items sit in <channel> (RSS 2.0) or at the top level (RSS 1.0, Atom)
+    return len(stack) <= 2
+
+
+def _entry(element):
+    entry = {}
+    tags = []
+    for child in element:
+        name = _local(child.tag)
+        namespace = _namespace(child.tag)
+        text = (child.text or '').strip()
+        if name == 'link':
+            href = child.get('href')
+            if href is None:
+                entry.setdefault('link', text)
+            elif child.get('rel', 'alternate') == 'alternate':
+                entry.setdefault('link', href)
+        elif name == 'category':
+            tags.append({'term': child.get('term') or text})
+        elif name in ('guid', 'id'):
+            entry['id'] = text
+        elif name == 'encoded' or (name == 'content' and not namespace.endswith('/mrss/')):
+            entry.setdefault('content', []).append({'value': _sanitize(_markup(child))})
+        elif name in SUMMARY_KEYS:
+            entry[SUMMARY_KEYS[name]] = _sanitize(_markup(child))
+        elif name in DATE_KEYS:
+            key = DATE_KEYS[name]
+            if key not in entry:
+                entry[key] = text
+                entry[f'{key}_parsed'] = _parse_date(text)
+        elif namespace in FEED_NAMESPACES and len(child) == 0:
+            # title, plus board-specific fields (e.g. We Work Remotely's <region>)
+            entry.setdefault(name, text)
+    if tags:
+        entry['tags'] = tags
+    if 'summary' not in entry and entry.get('content'):
+        entry['summary'] = entry['content'][0]['value']
+    return entry
+
+
+def _markup(element):
+    """Text of an element, keeping inline XHTML children (Atom type="xhtml") as markup."""
+    if len(element) == 0:
+        return element.text or ''
+    inner = ''.join(tostring(child, encoding='unicode') for child in element)
+    return (element.text or '') + inner
+
+
+def _sanitize(html):
+    return _sanitize_html(html, 'utf-8', 'text/html')
+
+
+def _parse_date(text):
+    """UTC struct_time for an RFC 822 (RSS) or ISO 8601 (Atom) date, like feedparser's *_parsed."""
+    if not text:
+        return None
+    try:
+        parsed = parsedate_to_datetime(text)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.timetuple()
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _namespace(tag):
+    return tag[1:].split('}', 1)[0] if tag.startswith('{') else ''
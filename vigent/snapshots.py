@@ -0,0 +1,214 @@
+"""
+Pre-rendered /api/jobs responses.
+
+Each distinct job-list payload is serialized and compressed (gzip, plus
+brotli when the optional brotli package is installed) once per job store
+version, then served as stored bytes with Cache-Control and a strong ETag
+per content coding. A request whose If-None-Match matches any of them gets a
+304 without any serialization.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from vigent import metrics
+from vigent.ingest import read_jobs
+from vigent.store import job_store
+
+logger = logging.getLogger(__name__)
+
+# Rendered responses kept in memory
+SNAPSHOT_CACHE_SIZE = int(os.environ.get('SNAPSHOT_CACHE_SIZE', '256'))
+
+# Seconds a snapshot is reused even if the store hasn't changed; bounds how
+# long relative date filters (?date=today) can lag behind the clock
+SNAPSHOT_TTL = float(os.environ.get('SNAPSHOT_TTL', '300'))
+
+# Seconds browsers and CDNs may reuse a job list without revalidating
+JOBS_CACHE_MAX_AGE = int(os.environ.get('JOBS_CACHE_MAX_AGE', '60'))
+
+# Bodies smaller than this aren't worth compressing
+MIN_COMPRESS_BYTES = 512
+
+
+class Snapshot:
+    """A JSON response rendered once: status, and a body and ETag per content coding."""
+
+    def __init__(self, status, payload, max_age=JOBS_CACHE_MAX_AGE):
+        self.status = status
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        digest = content_digest(payload)
+        self.cache_control = f'public, max-age={max_age}' if cacheable(status, payload) else 'no-cache'
+        self.created = time.monotonic()
+
+        self.bodies = {'identity': body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            if brotli is not None:
+                self.bodies['br'] = brotli.compress(body, quality=5)
+            self.bodies['gzip'] = gzip.compress(body, compresslevel=6, mtime=0)
+        # Strong validators must differ between representations, so each coding gets its own
+        self.etags = {
+            encoding: f'"{digest}"' if encoding == 'identity' else f'"{digest}-{encoding}"'
+            for encoding in self.bodies
+        }
+
+    def response(self, accept_encoding=None, if_none_match=None):
+        """`(status, headers, body)` for a request with these headers."""
+        encoding = self.encoding_for(accept_encoding)
+        headers = {
+            'ETag': self.etags[encoding],
+            'Cache-Control': self.cache_control,
+            'Vary': 'Accept-Encoding'
+        }
+        # Any coding's tag validates: the content behind them is the same
+        if any(etag_matches(if_none_match, etag) for etag in self.etags.values()):
+            return 304, headers, b''
+
+        body = self.bodies[encoding]
+        headers['Content-Type'] = 'application/json'
+        headers['Content-Length'] = str(len(body))
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return self.status, headers, body
+
+    def encoding_for(self, accept_encoding):
+        """The smallest stored coding the client accepts (brotli, then gzip, then none)."""
+        accepted = _accepted_codings(accept_encoding)
+        for encoding in ['br', 'gzip']:
+            if encoding in self.bodies and accepted.get(encoding, accepted.get('*', 0)) > 0:
+                return encoding
+        return 'identity'
+
+
+class SnapshotCache:
+    """
+    LRU of Snapshots by key; entries older than `ttl` seconds are re-rendered.
+    Only complete successes are kept (see cacheable), so a failed feed isn't
+    served from memory after it recovers.
+    """
+
+    def __init__(self, max_entries=SNAPSHOT_CACHE_SIZE, ttl=SNAPSHOT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, render):
+        """The snapshot for `key`, calling `render()` -> `(status, payload)` on a miss."""
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None and time.monotonic() - snapshot.created < self.ttl:
+                self._snapshots.move_to_end(key)
+                return snapshot
+
+        status, payload = render()
+        snapshot = Snapshot(status, payload)
+        if not cacheable(status, payload):
+            return snapshot
+        with self._lock:
+            self._snapshots[key] = snapshot
+            self._snapshots.move_to_end(key)
+            while len(self._snapshots) > self.max_entries:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+
+jobs_snapshots = SnapshotCache()
+
+
+def jobs_snapshot(query, params, store=None):
+    """
+    The rendered /api/jobs response for `query` (from parse_job_query).
+    Snapshots are keyed by the store version, so the next ingestion that
+    adds jobs invalidates them; `params` supplies the raw date filter, since
+    the parsed 'since' moves with the clock.
+    """
+    store = store or job_store
+    key = json.dumps([
+        store.version(),
+        dict(query, since=params.get('date') or params.get('since'))
+    ], sort_keys=True)
+
+    def render():
+        # Read one filtered page from the persistent job store; feeds are only touched by ingestion
+        with metrics.span('store'):
+            jobs, sources, next_cursor = read_jobs(**query, store=store)
+
+        if not jobs and not query['cursor']:
+            return 404, {
+                'success': False,
+                'error': 'No jobs found from any source',
+                'sources': sources,
+                'jobs': []
+            }
+
+        return 200, {
+            'success': True,
+            'count': len(jobs),
+            'source': query['source'],
+            'sources': sources,
+            'next_cursor': next_cursor,
+            'jobs': jobs
+        }
+
+    return jobs_snapshots.get(key, render)
+
+
+def content_digest(payload):
+    """
+    Hash of the parts of a payload that identify its content. Per-source
+    timings are measured again on every render, on every worker and
+    instance, so they are left out: the same job list keeps the same ETag
+    and clients can revalidate it wherever it was rendered.
+    """
+    sources = {
+        name: {key: value for key, value in source.items() if key != 'latency_ms'}
+        for name, source in (payload.get('sources') or {}).items()
+    }
+    stable = json.dumps(dict(payload, sources=sources), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(stable.encode('utf-8')).hexdigest()[:32]
+
+
+def cacheable(status, payload):
+    """A 200 whose sources all answered; errors and timeouts must be retried on the next request."""
+    if status != 200:
+        return False
+    return all(source.get('status') == 'ok' for source in (payload.get('sources') or {}).values())
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match comparison (weak, as RFC 9110 requires for this header)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+def _accepted_codings(accept_encoding):
+    codings = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        codings[coding.strip().lower()] = quality
+    return codings
@@ -0,0 +1,36 @@
+"""
+Server-Sent Events helpers for the streaming generation endpoints.
+"""
+import json
+import logging
+
+from vigent.generation import GenerationError
+
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = {
+    'Content-Type': 'text/event-stream',
+    'Cache-Control': 'no-cache',
+    # Stop proxies (nginx, Vercel) from buffering the stream
+    'X-Accel-Buffering': 'no'
+}
+
+
+def format_sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+def event_stream(events):
+    """
+    Encode `(event, data)` pairs as SSE messages. Errors raised while
+    generating become a final 'error' event, since the HTTP status has
+    already been sent.
+    """
+    try:
+        for event, data in events:
+            yield format_sse(event, data)
+    except GenerationError as e:
+        yield format_sse('error', {'error': e.message, 'status': e.status})
+    except Exception as e:
+        logger.error(f"Error while streaming: {str(e)}")
+        yield format_sse('error', {'error': f'Error generating application: {str(e)}', 'status': 500})
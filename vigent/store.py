@@ -0,0 +1,414 @@
+"""
+Persistent SQLite job store.
+
+Jobs are keyed by a stable hash of their link (see feeds.job_id), so IDs are
+the same across workers and restarts and history is kept beyond a feed's
+current entry window. Per-source ingestion state (HTTP validators and last
+ingestion time) and the term vectors of recently ranked resumes live
+alongside the jobs, so every worker sharing the file sees them.
+"""
+import base64
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+from vigent.vectorize import job_terms
+
+logger = logging.getLogger(__name__)
+
+# SQLite database file; Vercel functions can only write under /tmp
+JOB_STORE_PATH = os.environ.get(
+    'JOB_STORE_PATH',
+    '/tmp/vigent-jobs.db' if os.environ.get('VERCEL') else 'data/jobs.db'
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    link TEXT NOT NULL,
+    published_date TEXT,
+    sort_date TEXT NOT NULL DEFAULT '',
+    job_type TEXT,
+    location TEXT,
+    terms TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS feed_state (
+    source TEXT PRIMARY KEY,
+    etag TEXT,
+    modified TEXT,
+    last_ingested TEXT,
+    poll_interval REAL,
+    next_poll TEXT,
+    last_changed TEXT
+);
+
+CREATE TABLE IF NOT EXISTS resume_terms (
+    fingerprint TEXT PRIMARY KEY,
+    terms TEXT NOT NULL,
+    saved TEXT NOT NULL
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+    id UNINDEXED,
+    title,
+    description,
+    tokenize = 'porter unicode61'
+);
+
+-- Every listing is ordered by (sort_date DESC, id DESC), so each filter gets
+-- an index ending in that order and pages are read straight off the index
+CREATE INDEX IF NOT EXISTS jobs_sort_idx ON jobs (sort_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS jobs_source_sort_idx ON jobs (source, sort_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS jobs_type_sort_idx ON jobs (job_type, sort_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS jobs_location_sort_idx ON jobs (location, sort_date DESC, id DESC);
+"""
+
+# BM25 column weights for jobs_fts (id, title, description): title matches count more
+SEARCH_WEIGHTS = (0.0, 5.0, 1.0)
+
+# Days a resume's term vector is kept after it was last sent (see ranking.remember_resume)
+RESUME_TERMS_MAX_AGE_DAYS = 7
+
+
+class JobStore:
+    def __init__(self, path=None):
+        self.path = path or JOB_STORE_PATH
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def connect(self):
+        """Open a connection (one per call keeps the store safe to use from any thread)."""
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    conn = sqlite3.connect(self.path)
+                    conn.execute('PRAGMA journal_mode=WAL')
+                    conn.executescript(SCHEMA)
+                    conn.close()
+                    self._initialized = True
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def upsert_jobs(self, source, jobs):
+        """
+        Insert jobs not seen before and bump last_seen on the rest.
+        Returns the list of newly inserted jobs.
+        """
+        now = _now()
+        new_jobs = []
+        conn = self.connect()
+        try:
+            with conn:
+                for job in jobs:
+                    cursor = conn.execute(
+                        'INSERT OR IGNORE INTO jobs (id, source, link, published_date, sort_date, job_type, location, '
+                        'terms, first_seen, last_seen, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        (job['id'], source, job['link'], job.get('published_date'), job.get('published_date') or '',
+                         job.get('job_type'), job.get('location'), json.dumps(job_terms(job)), now, now,
+                         json.dumps(job))
+                    )
+                    if cursor.rowcount:
+                        # Index new jobs for search as they are ingested
+                        conn.execute(
+                            'INSERT INTO jobs_fts (id, title, description) VALUES (?, ?, ?)',
+                            (job['id'], job.get('title', ''), job.get('description', ''))
+                        )
+                        new_jobs.append(job)
+                    else:
+                        conn.execute('UPDATE jobs SET last_seen = ? WHERE id = ?', (now, job['id']))
+        finally:
+            conn.close()
+        return new_jobs
+
+    def list_jobs(self, sources=None, job_type=None, location=None, since=None,
+                  limit=None, cursor=None):
+        """
+        Return `(jobs, next_cursor)`: one page of stored jobs, newest first.
+
+        - sources: only jobs from these source names
+        - job_type: exact job type (Full-time, Part-time, Contract)
+        - location: exact location (a region set by vigent.enrich, or a board's default)
+        - since: ISO timestamp; older jobs are dropped (undated jobs are kept)
+        - cursor: next_cursor from the previous page
+
+        next_cursor is None on the last page.
+        """
+        query = 'SELECT id, sort_date, data FROM jobs'
+        conditions, params = _filter_conditions(sources, job_type, location, since)
+        if cursor:
+            cursor_date, cursor_id = decode_cursor(cursor)
+            conditions.append('(sort_date < ? OR (sort_date = ? AND id < ?))')
+            params.extend([cursor_date, cursor_date, cursor_id])
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY sort_date DESC, id DESC'
+        if limit:
+            # Fetch one extra row to know whether there is a next page
+            query += ' LIMIT ?'
+            params.append(limit + 1)
+
+        conn = self.connect()
+        try:
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+
+        next_cursor = None
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['sort_date'], rows[-1]['id'])
+        return [json.loads(row['data']) for row in rows], next_cursor
+
+    def search_jobs(self, text, sources=None, job_type=None, location=None, since=None,
+                    limit=None, offset=0):
+        """
+        Full-text search over job titles and descriptions, best BM25 match
+        first. Takes the same filters as list_jobs. Returns
+        `(jobs, has_more)`; each job carries its 'score' (higher is better).
+        """
+        match = fts_query(text)
+        if not match:
+            return [], False
+
+        conditions, params = _filter_conditions(sources, job_type, location, since, table='jobs.')
+        weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+        query = (
+            f'SELECT jobs.data, bm25(jobs_fts, {weights}) AS rank '
+            'FROM jobs_fts JOIN jobs ON jobs.id = jobs_fts.id '
+            'WHERE jobs_fts MATCH ?'
+        )
+        params.insert(0, match)
+        if conditions:
+            query += ' AND ' + ' AND '.join(conditions)
+        query += ' ORDER BY rank, jobs.sort_date DESC'
+        if limit:
+            query += ' LIMIT ? OFFSET ?'
+            params.extend([limit + 1, offset])
+
+        conn = self.connect()
+        try:
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+
+        has_more = bool(limit) and len(rows) > limit
+        jobs = []
+        for row in rows[:limit] if limit else rows:
+            job = json.loads(row['data'])
+            # SQLite's bm25() is negative, lower meaning more relevant
+            job['score'] = round(-row['rank'], 4)
+            jobs.append(job)
+        return jobs, has_more
+
+    def list_job_ids(self, sources=None, job_type=None, location=None, since=None):
+        """IDs of stored jobs matching the list_jobs filters."""
+        conditions, params = _filter_conditions(sources, job_type, location, since)
+        query = 'SELECT id FROM jobs'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        conn = self.connect()
+        try:
+            return [row['id'] for row in conn.execute(query, params)]
+        finally:
+            conn.close()
+
+    def get_jobs(self, job_ids):
+        """Stored jobs for `job_ids`, in the same order (unknown IDs are skipped)."""
+        if not job_ids:
+            return []
+        conn = self.connect()
+        try:
+            rows = conn.execute(
+                f"SELECT id, data FROM jobs WHERE id IN ({', '.join('?' for _ in job_ids)})",
+                list(job_ids)
+            ).fetchall()
+        finally:
+            conn.close()
+        by_id = {row['id']: json.loads(row['data']) for row in rows}
+        return [by_id[job_id] for job_id in job_ids if job_id in by_id]
+
+    def version(self):
+        """Changes whenever jobs are added; lets in-memory indexes know when to rebuild."""
+        conn = self.connect()
+        try:
+            return conn.execute('SELECT count(*), COALESCE(max(rowid), 0) FROM jobs').fetchone()[:]
+        finally:
+            conn.close()
+
+    def load_job_terms(self):
+        """Return [(id, {dimension: count})] for every stored job (vectors are saved by upsert_jobs)."""
+        conn = self.connect()
+        try:
+            rows = conn.execute('SELECT id, terms FROM jobs ORDER BY rowid').fetchall()
+        finally:
+            conn.close()
+        return [
+            (row['id'], {int(index): count for index, count in json.loads(row['terms']).items()})
+            for row in rows
+        ]
+
+    def has_job(self, job_id):
+        conn = self.connect()
+        try:
+            return conn.execute('SELECT 1 FROM jobs WHERE id = ?', (job_id,)).fetchone() is not None
+        finally:
+            conn.close()
+
+    def save_resume_terms(self, fingerprint, terms):
+        """Store a resume's {dimension: count} vector and drop those not sent for a while."""
+        now = datetime.now(timezone.utc)
+        expired = (now - timedelta(days=RESUME_TERMS_MAX_AGE_DAYS)).isoformat()
+        conn = self.connect()
+        try:
+            with conn:
+                conn.execute(
+                    'INSERT INTO resume_terms (fingerprint, terms, saved) VALUES (?, ?, ?) '
+                    'ON CONFLICT(fingerprint) DO UPDATE SET saved = excluded.saved',
+                    (fingerprint, json.dumps(terms), now.isoformat())
+                )
+                conn.execute('DELETE FROM resume_terms WHERE saved < ?', (expired,))
+        finally:
+            conn.close()
+
+    def get_resume_terms(self, fingerprint):
+        """A saved resume vector, or None if that fingerprint is unknown or expired."""
+        conn = self.connect()
+        try:
+            row = conn.execute('SELECT terms FROM resume_terms WHERE fingerprint = ?', (fingerprint,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return {int(index): count for index, count in json.loads(row['terms']).items()}
+
+    def get_feed_state(self, source):
+        conn = self.connect()
+        try:
+            row = conn.execute('SELECT * FROM feed_state WHERE source = ?', (source,)).fetchone()
+            return dict(row) if row else None
+        finally:
+            conn.close()
+
+    def get_poll_schedules(self):
+        """{source: {'poll_interval', 'next_poll', 'last_changed', 'last_ingested'}} for every known source."""
+        conn = self.connect()
+        try:
+            rows = conn.execute(
+                'SELECT source, poll_interval, next_poll, last_changed, last_ingested FROM feed_state'
+            ).fetchall()
+            return {row['source']: dict(row) for row in rows}
+        finally:
+            conn.close()
+
+    def claim_poll(self, source, now, lease_until):
+        """
+        Atomically take the next poll of `source` if it is due at `now` (ISO
+        timestamps), pushing next_poll to `lease_until` so other workers sharing
+        the store skip it. Returns False if another worker already claimed it.
+        """
+        conn = self.connect()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    'INSERT INTO feed_state (source, next_poll) VALUES (?, ?) '
+                    'ON CONFLICT(source) DO UPDATE SET next_poll = excluded.next_poll '
+                    'WHERE feed_state.next_poll IS NULL OR feed_state.next_poll <= ?',
+                    (source, lease_until, now)
+                )
+                return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def set_poll_schedule(self, source, poll_interval, next_poll, changed=False):
+        conn = self.connect()
+        try:
+            with conn:
+                conn.execute(
+                    'UPDATE feed_state SET poll_interval = ?, next_poll = ?, '
+                    'last_changed = CASE WHEN ? THEN ? ELSE last_changed END WHERE source = ?',
+                    (poll_interval, next_poll, changed, _now(), source)
+                )
+        finally:
+            conn.close()
+
+    def set_feed_state(self, source, validators=None):
+        validators = validators or {}
+        conn = self.connect()
+        try:
+            with conn:
+                conn.execute(
+                    'INSERT INTO feed_state (source, etag, modified, last_ingested) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT(source) DO UPDATE SET etag = excluded.etag, modified = excluded.modified, '
+                    'last_ingested = excluded.last_ingested',
+                    (source, validators.get('etag'), validators.get('modified'), _now())
+                )
+        finally:
+            conn.close()
+
+
+def fts_query(text):
+    """
+    Build an FTS5 MATCH expression from free text: every word must match,
+    the last one as a prefix so results show up while typing. Punctuation
+    is dropped so user input can't produce FTS syntax errors.
+    """
+    terms = re.findall(r'\w+', text.lower())
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def _filter_conditions(sources=None, job_type=None, location=None, since=None, table=''):
+    """SQL conditions and parameters shared by listing and search filters."""
+    conditions = []
+    params = []
+    if sources is not None:
+        conditions.append(f"{table}source IN ({', '.join('?' for _ in sources)})")
+        params.extend(sources)
+    if job_type:
+        conditions.append(f'{table}job_type = ?')
+        params.append(job_type)
+    if location:
+        # Ingestion stores one canonical region per job, so this is an exact,
+        # indexed match ('%us%' would also match "Australia" or "business")
+        conditions.append(f'{table}location = ?')
+        params.append(location)
+    if since:
+        conditions.append(f"({table}sort_date >= ? OR {table}sort_date = '')")
+        params.append(since)
+    return conditions, params
+
+
+def encode_cursor(sort_date, job_id):
+    return base64.urlsafe_b64encode(f'{sort_date}|{job_id}'.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Decode a pagination cursor; raises ValueError if it is malformed."""
+    try:
+        sort_date, job_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|', 1)
+    except Exception:
+        raise ValueError('Invalid cursor')
+    return sort_date, job_id
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+job_store = JobStore()
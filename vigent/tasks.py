@@ -0,0 +1,174 @@
+"""
+Submit/poll application generation.
+
+POST /api/generate-application/tasks queues a package and returns a task ID
+right away; a process-wide worker pool runs the generation and records each
+part (cover letter, questions, individual answers) in a local SQLite task
+store as it completes, so polling shows progress and a slow package never
+holds an HTTP request open. Gemini calls from all tasks share the
+process-wide limits in vigent.gemini.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from vigent.generation import GenerationError, stream_application_events
+
+logger = logging.getLogger(__name__)
+
+# SQLite file holding task progress; Vercel functions can only write under /tmp
+TASK_STORE_PATH = os.environ.get(
+    'TASK_STORE_PATH',
+    '/tmp/vigent-tasks.db' if os.environ.get('VERCEL') else 'data/tasks.db'
+)
+
+# Packages generated at the same time
+TASK_WORKERS = int(os.environ.get('TASK_WORKERS', '4'))
+
+# Seconds a queued package may take; longer than a request since nobody is waiting on it
+TASK_DEADLINE = float(os.environ.get('TASK_DEADLINE', '120'))
+
+# Hours finished tasks are kept for polling
+TASK_RETENTION_HOURS = int(os.environ.get('TASK_RETENTION_HOURS', '24'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created TEXT NOT NULL,
+    updated TEXT NOT NULL,
+    result TEXT NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_updated_idx ON tasks (updated);
+"""
+
+
+class TaskStore:
+    def __init__(self, path=None):
+        self.path = path or TASK_STORE_PATH
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def connect(self):
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    conn = sqlite3.connect(self.path)
+                    conn.execute('PRAGMA journal_mode=WAL')
+                    conn.executescript(SCHEMA)
+                    conn.close()
+                    self._initialized = True
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create(self):
+        task_id = uuid.uuid4().hex
+        now = _now()
+        cutoff = (datetime.now(timezone.utc) - timedelta(hours=TASK_RETENTION_HOURS)).isoformat()
+        conn = self.connect()
+        try:
+            with conn:
+                conn.execute('DELETE FROM tasks WHERE updated < ?', (cutoff,))
+                conn.execute(
+                    'INSERT INTO tasks (id, status, created, updated, result) VALUES (?, ?, ?, ?, ?)',
+                    (task_id, 'queued', now, now, json.dumps({'cover_letter': None, 'questions': []}))
+                )
+        finally:
+            conn.close()
+        return task_id
+
+    def update(self, task_id, status, result=None, error=None):
+        conn = self.connect()
+        try:
+            with conn:
+                if result is None:
+                    conn.execute(
+                        'UPDATE tasks SET status = ?, updated = ?, error = ? WHERE id = ?',
+                        (status, _now(), error, task_id)
+                    )
+                else:
+                    conn.execute(
+                        'UPDATE tasks SET status = ?, updated = ?, result = ?, error = ? WHERE id = ?',
+                        (status, _now(), json.dumps(result), error, task_id)
+                    )
+        finally:
+            conn.close()
+
+    def get(self, task_id):
+        conn = self.connect()
+        try:
+            row = conn.execute('SELECT * FROM tasks WHERE id = ?', (task_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return {
+            'task_id': row['id'],
+            'status': row['status'],
+            'created': row['created'],
+            'updated': row['updated'],
+            'error': row['error'],
+            **json.loads(row['result'])
+        }
+
+
+task_store = TaskStore()
+_workers = ThreadPoolExecutor(max_workers=TASK_WORKERS, thread_name_prefix='generation-task')
+
+
+def submit_application_task(model, job_title, job_description, resume,
+                            regenerate=False, store=None):
+    """Queue an application package and return its task ID."""
+    store = store or task_store
+    task_id = store.create()
+    _workers.submit(_run_application_task, store, task_id, model,
+                    job_title, job_description, resume, regenerate)
+    return task_id
+
+
+def _run_application_task(store, task_id, model, job_title, job_description, resume, regenerate):
+    result = {'cover_letter': None, 'questions': []}
+    cover_parts = []
+    try:
+        store.update(task_id, 'running')
+        events = stream_application_events(
+            model, job_title, job_description, resume,
+            regenerate=regenerate, deadline=TASK_DEADLINE
+        )
+        for event, data in events:
+            if event == 'cover_letter':
+                cover_parts.append(data['delta'])
+                continue
+            if event == 'questions':
+                # The cover letter is complete once the questions arrive
+                result['cover_letter'] = ''.join(cover_parts)
+                result['questions'] = [
+                    {'question': question, 'answer': None}
+                    for question in data['questions']
+                ]
+            elif event == 'answer':
+                result['questions'][data['index']]['answer'] = data['answer']
+            elif event == 'done':
+                result['cached'] = data['cached']
+                store.update(task_id, 'done', result)
+                return
+            store.update(task_id, 'running', result)
+    except GenerationError as e:
+        store.update(task_id, 'error', result, e.message)
+    except Exception as e:
+        logger.error(f"Error generating application task {task_id}: {str(e)}")
+        store.update(task_id, 'error', result, f'Error generating application: {str(e)}')
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
@@ -0,0 +1,42 @@
+"""
+Hashing text vectorizer used for resume-to-job relevance.
+
+Pure Python so ingestion can compute job term vectors without loading NumPy;
+vigent.ranking turns them into a dense matrix.
+"""
+import re
+import zlib
+
+# Number of hashed feature dimensions
+VECTOR_DIM = 1024
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have',
+    'in', 'is', 'it', 'its', 'of', 'on', 'or', 'our', 'that', 'the', 'this', 'to',
+    'we', 'will', 'with', 'you', 'your', 'i', 'my', 'me', 'am', 'was', 'were',
+    'nbsp', 'amp', 'br', 'li', 'ul', 'div', 'span', 'strong', 'p'
+}
+
+TAG_RE = re.compile(r'<[^>]+>')
+TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#]*')
+
+
+def tokenize(text):
+    text = TAG_RE.sub(' ', text or '').lower()
+    return [token for token in TOKEN_RE.findall(text) if token not in STOP_WORDS and len(token) > 1]
+
+
+def term_counts(text):
+    """Hashed term frequencies of `text` as {dimension: count}."""
+    counts = {}
+    for token in tokenize(text):
+        # crc32 rather than hash() so dimensions are stable across processes
+        index = zlib.crc32(token.encode('utf-8')) % VECTOR_DIM
+        counts[index] = counts.get(index, 0) + 1
+    return counts
+
+
+def job_terms(job):
+    """Term counts for a job; the title is counted twice so it weighs more."""
+    title = job.get('title', '')
+    return term_counts(f"{title} {title} {job.get('description', '')}")